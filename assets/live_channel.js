@@ -0,0 +1,56 @@
+// Subscribes to the server's /live/stream and turns pushed results events
+// into version changes for the dashboard's callbacks (see live_channel.py).
+(function () {
+    // Without the stream, ask the server every this many interval ticks
+    var POLL_TICKS = 10;
+
+    var live = {event: null, connected: false};
+    window.electionsLive = live;
+
+    function connect() {
+        // Relative, so it follows the app's url prefix
+        var source = new EventSource("live/stream");
+        source.onopen = function () {
+            live.connected = true;
+        };
+        source.onerror = function () {
+            // EventSource reconnects by itself; poll until it does
+            live.connected = false;
+        };
+        source.addEventListener("results", function (message) {
+            live.event = JSON.parse(message.data);
+            live.connected = true;
+        });
+        source.addEventListener("full", function (message) {
+            // The worker has no room for another stream: poll, and try
+            // again later, spread out so rejected tabs don't return together
+            source.close();
+            live.connected = false;
+            var retry = (JSON.parse(message.data).retry || 30) * 1000;
+            setTimeout(connect, retry * (1 + Math.random()));
+        });
+    }
+
+    if (window.EventSource) {
+        connect();
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        live: {
+            versions: function (n_intervals, results, sentiment) {
+                var noUpdate = window.dash_clientside.no_update;
+                var next;
+                if (live.connected && live.event) {
+                    next = [live.event.results, live.event.sentiment];
+                } else {
+                    var poll = "poll-" + Math.floor((n_intervals || 0) / POLL_TICKS);
+                    next = [poll, poll];
+                }
+                return [
+                    next[0] === results ? noUpdate : next[0],
+                    next[1] === sentiment ? noUpdate : next[1],
+                ];
+            },
+        },
+    });
+})();
@@ -8,42 +8,23 @@ from dash.dependencies import Input, Output
 import plotly.express as px
 import plotly.graph_objs as go
 import datetime
+from results_transform import process_data
+from geometry import load_boundaries
+from results_store import ResultsStore, read_results
 
 # Replace this with your Mapbox access token
 mapbox_access_token = "your_mapbox_access_token_here"
 
 # Replace example_data with your actual data
-example_data = pd.read_excel("new_elections_data.xlsx")
-
-# Add Senegal GeoJSON data
-senegal_geojson = json.load(open("senegal.geojson", "r"))
-
-def process_data(data):
-    df = data.copy()
-    candidates = ["Macky SALL", "Idrissa SECK", "Ousmane Sonko", "Madické NIANG", "El hadji SALL"]
-    
-    for candidate in candidates:
-        df[candidate] = pd.to_numeric(df[candidate], errors='coerce')
-    
-    df = df[df["Votes"] > 0]
-    df = df.dropna(subset=candidates)
-    
-    for candidate in candidates:
-        df[f"{candidate}"] = df[candidate] / df["Votes"] * 100
-
-    df = pd.melt(df, id_vars=["Department", "Votes"], value_vars=[f"{candidate}" for candidate in candidates], var_name="Candidate", value_name="Percentage")
-    
-    return df
+# (parsed once, and again only when the file changes)
+results_store = ResultsStore("new_elections_data.xlsx", loader=read_results)
+example_data = results_store.snapshot().data
 
+# Add Senegal GeoJSON data (simplified once per process)
+senegal_geojson = load_boundaries()
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
-@app.server.before_request
-def before_request():
-    global api_data
-    api_data = get_live_data()
-
-
 current_row_index = 0
 
 
@@ -53,10 +34,8 @@ def get_live_data():
     global current_row_index
 
     # Replace with the actual API or data source
-    data = pd.read_excel("new_elections_data.xlsx")
-
-    # Convert the Timestamp column to timezone-aware timestamps
-    data['Timestamp'] = pd.to_datetime('2022-04-10 ' + data['Timestamp'], utc=True, format="%Y-%m-%d %H:%M:%S")
+    # (Timestamps are already converted to timezone-aware values by read_results)
+    data = results_store.snapshot().data
 
     # Filter data based on the current row index and the timestamp column
     filtered_data = data.iloc[:current_row_index]
@@ -0,0 +1,263 @@
+"""Time the elections2 callbacks at growing data sizes and concurrency.
+
+For each ``--bureaux`` count it generates a synthetic election with
+synthetic_election.py (every bureau reporting ``--waves`` times with
+increasing HH:MM:SS stamps, counts growing wave by wave) and a comments
+sheet. The bureaux are spread over the real 45 departments, or over
+``--departments`` numbered ones. The department filters the requests
+cycle through are taken from the scenario's own departments, and both
+are recorded in each result. The candidates are always the real five.
+It then starts a fresh process with the dashboard pointed at them, and
+posts each callback through the Flask test client: once cold, then
+``--repeat`` times per ``--concurrency`` level. Only successful
+responses are timed. Failed ones are counted in ``errors``, and any
+failure makes the run exit non-zero after writing the report. Results
+are one JSON document, to keep between releases and compare:
+
+    python bench_callbacks.py --bureaux 45 4500 14000 --concurrency 1 8 --output bench_callbacks.json
+    python bench_callbacks.py --bureaux 14000 --departments 550
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dimensions import CANDIDATES
+from synthetic_election import SyntheticElection
+
+
+WORDS = ["Sonko", "Macky", "mandat", "jeunesse", "emploi", "paix", "bravo", "non", "oui", "espoir", "dafa", "neex", "changement", "Senegal"]
+
+
+def comment_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS, dtype=object)
+    texts = [" ".join(words[rng.integers(0, len(words), rng.integers(2, 9))]) + f" #{i % 997}" for i in range(count)]
+    return pd.DataFrame({
+        "Comments": texts,
+        "Candidate": np.array(CANDIDATES, dtype=object)[rng.integers(0, len(CANDIDATES), count)],
+    })
+
+
+def write_scenario(directory, bureaux, departments, waves, comments, seed):
+    election = SyntheticElection(departments=departments, bureaux=bureaux, waves=waves, seed=seed)
+    rows = election.write(os.path.join(directory, "results.csv"), sidecar=False)
+    comment_rows(comments, seed).to_csv(os.path.join(directory, "comments.csv"), index=False)
+    return election, rows
+
+
+def scenario_env(directory):
+    env = dict(os.environ)
+    env.update({
+        "ELECTIONS_RESULTS": os.path.join(directory, "results.csv"),
+        "ELECTIONS_COMMENTS": os.path.join(directory, "comments.csv"),
+        "ELECTIONS_SCORES": os.path.join(directory, "scores.bin"),
+        "REPLAY_CLOCK_PATH": os.path.join(directory, "replay_clock.sqlite"),
+        "FIGURE_CACHE_DIR": os.path.join(directory, "figures"),
+        "SERVER_STORE_DIR": os.path.join(directory, "server_store"),
+    })
+    return env
+
+
+# Callbacks by output, with the input values for the i-th request. Requests
+# cycle through selections so the first pass misses the figure cache.
+CANDIDATE_SELECTIONS = [[], ["Macky SALL"], ["Ousmane Sonko", "Idrissa SECK"]]
+
+
+def department_selections(departments):
+    """No filter, the first one, the first three and the last two departments."""
+    return [[], departments[:1], departments[:3], departments[-2:]]
+
+
+def callback_inputs(version, i, selections):
+    departments = selections[i % len(selections)]
+    candidates = CANDIDATE_SELECTIONS[i % len(CANDIDATE_SELECTIONS)]
+    return {
+        "region-dropdown.value": departments,
+        "candidate-dropdown.value": candidates,
+        "map-mode-toggle.value": "lead",
+        "results-version.data": version,
+        "sentiment-version.data": version,
+        "filtered-data-store.data": f"results-table:{version}",
+        "results-table.page_current": i % 3,
+        "results-table.page_size": 20,
+        "results-table.sort_by": [{"column_id": CANDIDATES[i % len(CANDIDATES)], "direction": "desc"}],
+        "election-results-map.clickData": {"points": [{"location": (departments or selections[1])[0]}]},
+    }
+
+
+def request_body(dependency, values):
+    inputs = [
+        {"id": i["id"], "property": i["property"], "value": values.get(f"{i['id']}.{i['property']}")}
+        for i in dependency["inputs"]
+    ]
+    state = [{"id": s["id"], "property": s["property"], "value": None} for s in dependency["state"]]
+    return {
+        "output": dependency["output"],
+        "outputs": None,
+        "inputs": inputs,
+        "state": state,
+        "changedPropIds": [f"{inputs[-1]['id']}.{inputs[-1]['property']}"],
+    }
+
+
+def callback_name(dependency):
+    # Server callbacks are named after their first output in the report
+    return dependency["output"].strip(".").split("...")[0]
+
+
+def run_worker(args):
+    """Runs inside the scenario process: import the app and time its callbacks."""
+    import elections2
+
+    # A replay started in 1970 has revealed every generated row
+    elections2.replay_clock.reset(started_at=0, speed=1.0)
+    version = elections2.ticks.current().version
+    server = elections2.app.server
+    dependencies = json.loads(server.test_client().get("/_dash-dependencies").data)
+    dependencies = [d for d in dependencies if not d.get("clientside_function")]
+    selections = json.loads(args.selections)
+
+    for dependency in dependencies:
+        name = callback_name(dependency)
+        client = server.test_client()
+        started = time.perf_counter()
+        response = client.post("/_dash-update-component", json=request_body(dependency, callback_inputs(version, 0, selections)))
+        cold = time.perf_counter() - started
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"{name}: HTTP {response.status_code} {response.data[:500]!r}")
+
+        for concurrency in args.concurrency:
+            timings = []
+            sizes = []
+            errors = []
+            lock = threading.Lock()
+
+            def hit(worker):
+                local = server.test_client()
+                for i in range(worker, args.repeat, concurrency):
+                    body = request_body(dependency, callback_inputs(version, i, selections))
+                    t = time.perf_counter()
+                    try:
+                        r = local.post("/_dash-update-component", json=body)
+                    except Exception as e:
+                        with lock:
+                            errors.append(repr(e))
+                        continue
+                    elapsed = time.perf_counter() - t
+                    with lock:
+                        if r.status_code not in (200, 204):
+                            errors.append(f"HTTP {r.status_code} {r.data[:200]!r}")
+                            continue
+                        timings.append(elapsed)
+                        sizes.append(len(r.data))
+
+            threads = [threading.Thread(target=hit, args=(worker,)) for worker in range(concurrency)]
+            wall = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.perf_counter() - wall
+
+            timings = np.array(timings) * 1e3
+            print(json.dumps({
+                "callback": name,
+                "concurrency": concurrency,
+                "requests": len(timings),
+                "errors": len(errors),
+                "first_error": errors[0] if errors else None,
+                "cold_ms": round(cold * 1e3, 3),
+                "p50_ms": round(float(np.percentile(timings, 50)), 3) if len(timings) else None,
+                "p95_ms": round(float(np.percentile(timings, 95)), 3) if len(timings) else None,
+                "max_ms": round(float(timings.max()), 3) if len(timings) else None,
+                "throughput_rps": round(len(timings) / wall, 1),
+                "response_bytes": int(np.median(sizes)) if sizes else None,
+            }), flush=True)
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import dash
+    return {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dash": dash.__version__,
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bureaux", type=int, nargs="+", default=[45, 4500, 14000])
+    parser.add_argument("--departments", type=int, help="default: the real 45, else numbered departments")
+    parser.add_argument("--waves", type=int, default=3, help="reports per bureau")
+    parser.add_argument("--comments-per-bureau", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=48, help="requests per callback and concurrency level")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--selections", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    report = {"meta": metadata(), "results": []}
+    for bureaux in args.bureaux:
+        with tempfile.TemporaryDirectory(prefix="bench_callbacks_") as directory:
+            comments = max(1, int(bureaux * args.comments_per_bureau))
+            election, rows = write_scenario(directory, bureaux, args.departments, args.waves, comments, args.seed)
+            selections = department_selections(election.departments)
+            command = [sys.executable, os.path.abspath(__file__), "--worker", "--repeat", str(args.repeat)]
+            command += ["--selections", json.dumps(selections), "--concurrency"] + [str(c) for c in args.concurrency]
+            started = time.perf_counter()
+            worker = subprocess.run(command, env=scenario_env(directory), capture_output=True, text=True)
+            if worker.returncode != 0:
+                sys.exit(f"scenario with {bureaux} bureaux failed:\n{worker.stderr}")
+            scenario = {
+                "bureaux": bureaux,
+                "departments": len(election.departments),
+                "department_selections": selections,
+                "rows": rows,
+                "comments": comments,
+                "seconds": round(time.perf_counter() - started, 2),
+            }
+            for line in worker.stdout.splitlines():
+                if line.startswith("{"):
+                    report["results"].append({**scenario, **json.loads(line)})
+            print(
+                f"{bureaux} bureaux in {len(election.departments)} departments: {rows} rows, {comments} comments, {scenario['seconds']} s",
+                file=sys.stderr,
+            )
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = [result for result in report["results"] if result["errors"]]
+    if failed:
+        sys.exit(f"{sum(result['errors'] for result in failed)} failed requests in {len(failed)} results; see \"errors\" in the report")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Memory and filter latency: string Department/Candidate columns against dimension codes.
+
+Builds a tidy (one row per bureau and candidate) frame at polling-station
+scale and times the dashboard's filters and per-candidate means both ways,
+plus the filter through the precomputed bitmaps of ``filter_index``:
+
+    python bench_dimensions.py --bureaux 14000 100000
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from dimensions import CANDIDATES, REGIONS, candidate_codes, department_codes
+from filter_index import FilterIndex
+
+
+def tidy_frame(bureaux, seed=0):
+    rng = np.random.default_rng(seed)
+    departments = np.array([name for names in REGIONS.values() for name in names], dtype=object)
+    department = departments[rng.integers(0, len(departments), bureaux)]
+    return pd.DataFrame({
+        "Department": np.repeat(department, len(CANDIDATES)),
+        "Candidate": np.tile(np.array(CANDIDATES, dtype=object), bureaux),
+        "Percentage": rng.uniform(0, 100, bureaux * len(CANDIDATES)),
+    })
+
+
+def best_of(func, repeat=5, number=10):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bureaux", type=int, nargs="+", default=[14000, 100000])
+    args = parser.parse_args()
+
+    selected_departments = ["Dakar", "Pikine", "Thies"]
+    selected_candidates = ["Macky SALL", "Ousmane Sonko"]
+
+    for bureaux in args.bureaux:
+        strings = tidy_frame(bureaux)
+        department = department_codes.encode(strings["Department"].to_numpy())
+        candidate = candidate_codes.encode(strings["Candidate"].to_numpy())
+        percentage = strings["Percentage"].to_numpy()
+        wanted_departments = department_codes.encode(selected_departments)
+        wanted_candidates = candidate_codes.encode(selected_candidates)
+
+        string_bytes = strings[["Department", "Candidate"]].memory_usage(deep=True, index=False).sum()
+        code_bytes = department.nbytes + candidate.nbytes
+
+        def filter_strings():
+            return strings[strings["Department"].isin(selected_departments) & strings["Candidate"].isin(selected_candidates)]
+
+        def filter_codes():
+            return np.flatnonzero(np.isin(department, wanted_departments) & np.isin(candidate, wanted_candidates))
+
+        index = FilterIndex(len(strings), Department=department, Candidate=candidate)
+
+        def filter_bitmaps():
+            return np.flatnonzero(index.mask(Department=selected_departments, Candidate=selected_candidates))
+
+        def means_strings():
+            return strings.groupby("Candidate")["Percentage"].mean()
+
+        def means_codes():
+            counts = np.bincount(candidate, minlength=len(candidate_codes))
+            return np.bincount(candidate, weights=percentage, minlength=len(candidate_codes)) / counts
+
+        assert len(filter_strings()) == len(filter_codes()) == len(filter_bitmaps())
+        expected = means_strings()
+        assert np.allclose(means_codes()[candidate_codes.encode(expected.index)], expected.to_numpy())
+
+        print(f"{bureaux} bureaux, {len(strings)} rows")
+        print(f"  label columns  strings {string_bytes / 2**20:8.2f} MB  codes {code_bytes / 2**20:8.2f} MB  ({string_bytes / code_bytes:.0f}x)")
+        for name, slow, fast in [("filter", filter_strings, filter_codes), ("candidate means", means_strings, means_codes)]:
+            slow_s, fast_s = best_of(slow), best_of(fast)
+            print(f"  {name:<15} strings {slow_s * 1e3:8.3f} ms  codes {fast_s * 1e3:8.3f} ms  ({slow_s / fast_s:.1f}x)")
+        bitmap_s = best_of(filter_bitmaps, number=100)
+        print(f"  {'bitmap filter':<15} {bitmap_s * 1e6:8.1f} us, index built once in {best_of(lambda: FilterIndex(len(strings), Department=department, Candidate=candidate), 3, 1) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Load test for the /live/stream push channel with N simulated subscribers.
+
+By default it serves a LiveChannel on a local threaded server, publishes
+``--events`` synthetic changes and reports how long each took to reach
+every subscriber:
+
+    python bench_live_channel.py --subscribers 50 200 500
+
+With ``--url`` it subscribes to a running dashboard instead and reports
+what arrived and how far apart the same event reached each subscriber:
+
+    python bench_live_channel.py --url http://localhost:8080/live/stream --subscribers 200 --seconds 60
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+import requests
+from flask import Flask
+from werkzeug.serving import make_server
+
+from live_channel import LiveChannel
+
+
+class Subscriber(threading.Thread):
+    """Reads one event stream and records when each event id arrived."""
+
+    def __init__(self, url, ready, stop):
+        super().__init__(daemon=True)
+        self.url = url
+        self.ready = ready
+        self.stop = stop
+        self.arrivals = {}
+        self.sent = {}
+        self.error = None
+
+    def run(self):
+        try:
+            with requests.get(self.url, stream=True, timeout=(10, 60)) as response:
+                response.raise_for_status()
+                self.ready.release()
+                event_id, data = None, None
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if self.stop.is_set():
+                        return
+                    if line.startswith("id:"):
+                        event_id = int(line[3:])
+                    elif line.startswith("data:"):
+                        data = line[5:].strip()
+                    elif line == "" and event_id is not None:
+                        self.arrivals[event_id] = time.perf_counter()
+                        sent = json.loads(data).get("sent") if data else None
+                        if sent is not None:
+                            self.sent[event_id] = sent
+                        event_id, data = None, None
+        except Exception as exc:
+            if not self.stop.is_set():
+                self.error = exc
+                self.ready.release()
+
+
+def start_subscribers(url, count):
+    ready = threading.Semaphore(0)
+    stop = threading.Event()
+    subscribers = [Subscriber(url, ready, stop) for _ in range(count)]
+    for subscriber in subscribers:
+        subscriber.start()
+    for _ in subscribers:
+        ready.acquire(timeout=30)
+    return subscribers, stop
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1e3 if len(values) else float("nan")
+
+
+def fan_out_spread(subscribers, after=0):
+    """Per event, the time between the first and last subscriber receiving it.
+
+    Events up to ``after`` are skipped: they arrive on connect, not on publish.
+    """
+    arrivals = {}
+    for subscriber in subscribers:
+        for event_id, at in subscriber.arrivals.items():
+            if event_id > after:
+                arrivals.setdefault(event_id, []).append(at)
+    return [max(times) - min(times) for times in arrivals.values() if len(times) == len(subscribers)]
+
+
+def local_run(count, events, interval):
+    state = {"version": 0}
+
+    def watch(previous):
+        if previous and previous["version"] == state["version"]:
+            return None
+        return {"version": state["version"], "sent": time.perf_counter()}
+
+    app = Flask(__name__)
+    # The werkzeug server has a thread per connection, so no cap is needed
+    channel = LiveChannel(watch, poll_seconds=0.005, heartbeat_seconds=5, max_subscribers=count)
+    channel.register(app)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/live/stream"
+
+    started = time.perf_counter()
+    subscribers, stop = start_subscribers(url, count)
+    connect = time.perf_counter() - started
+    connected = [s for s in subscribers if s.error is None]
+    channel.poll()
+    time.sleep(interval)
+
+    first_event = channel.published
+    for _ in range(events):
+        state["version"] += 1
+        time.sleep(interval)
+    # Let the last event drain
+    time.sleep(max(interval, 0.5))
+
+    latencies = [
+        subscriber.arrivals[event_id] - sent
+        for subscriber in connected
+        for event_id, sent in subscriber.sent.items()
+        if event_id > first_event
+    ]
+    delivered = sum(1 for s in connected for event_id in s.arrivals if event_id > first_event)
+    spread = fan_out_spread(connected, after=first_event)
+    stop.set()
+    server.shutdown()
+    return {
+        "subscribers": count,
+        "connected": len(connected),
+        "connect_s": round(connect, 3),
+        "events": events,
+        "delivered": delivered,
+        "expected": events * len(connected),
+        "dropped": channel.dropped,
+        "latency_p50_ms": round(percentile(latencies, 50), 2),
+        "latency_p95_ms": round(percentile(latencies, 95), 2),
+        "latency_max_ms": round(percentile(latencies, 100), 2),
+        "spread_p95_ms": round(percentile(spread, 95), 2),
+    }
+
+
+def remote_run(url, count, seconds):
+    started = time.perf_counter()
+    subscribers, stop = start_subscribers(url, count)
+    connect = time.perf_counter() - started
+    time.sleep(seconds)
+    stop.set()
+    connected = [s for s in subscribers if s.error is None]
+    spread = fan_out_spread(connected)
+    return {
+        "subscribers": count,
+        "connected": len(connected),
+        "connect_s": round(connect, 3),
+        "events_per_subscriber": round(float(np.mean([len(s.arrivals) for s in connected])), 2) if connected else 0,
+        "spread_p50_ms": round(percentile(spread, 50), 2),
+        "spread_p95_ms": round(percentile(spread, 95), 2),
+        "errors": sorted({type(s.error).__name__ for s in subscribers if s.error is not None}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between local events")
+    parser.add_argument("--url", help="stream of a running server instead of a local channel")
+    parser.add_argument("--seconds", type=float, default=30, help="how long to listen with --url")
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    for count in args.subscribers:
+        if args.url:
+            result = remote_run(args.url, count, args.seconds)
+        else:
+            result = local_run(count, args.events, args.interval)
+        print(json.dumps(result))
+
+    # What the same audience cost with every browser polling every 10 seconds
+    for count in args.subscribers:
+        print(f"polling equivalent for {count} browsers: {count / 10:.1f} requests/s, each running 3 callbacks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Throughput of official_csv against pd.read_csv plus post-processing.
+
+Writes commission-format files (``;``, BOM, CRLF, ``1 190`` numbers, the
+two-line header) with ``--rows`` bureau-level rows, then reads each one:
+
+* ``read_csv + fixes``: the manual route, reading everything as text,
+  then fixing the header, stripping separators and converting columns
+* ``read_csv thousands``: pandas' tokenizer alone with ``thousands=" "``;
+  the header and departments are left as they are, so this is a floor
+* ``official_csv``: typed, canonical output in ``--chunk-mb`` blocks
+
+    python bench_official_csv.py --rows 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from dimensions import canonical_columns
+from official_csv import read_official
+
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "elections_senegal.csv")
+
+
+def french(values):
+    """Integers with spaces between thousands, as the commission writes them."""
+    return pd.Series(values).map("{:,}".format).str.replace(",", " ", regex=False)
+
+
+def write_official(path, rows, seed=0):
+    with open(SAMPLE, "rb") as f:
+        header = b"".join(f.readline() for _ in range(2))
+    sample = read_official(SAMPLE)
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(sample), rows)
+    columns = [sample["Department"].to_numpy()[picks]]
+    for column in sample.columns[1:]:
+        # Bureau-sized counts, scattered around the department's own
+        scale = np.maximum(sample[column].to_numpy()[picks] // 400, 1)
+        columns.append(french(rng.integers(0, scale * 2 + 1)))
+    lines = pd.concat([pd.Series(c) for c in columns], axis=1).astype(str).agg(";".join, axis=1)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(("\r\n".join(lines) + "\r\n").encode("utf-8"))
+
+
+def read_csv_with_fixes(path):
+    data = pd.read_csv(path, sep=";", encoding="utf-8-sig", header=None, dtype=str)
+    names = [" ".join(str(part) for part in pair if isinstance(part, str)).strip() for pair in zip(data.iloc[0], data.iloc[1])]
+    data = data.iloc[2:].reset_index(drop=True)
+    data.columns = names
+    data = canonical_columns(data)
+    for column in data.columns[1:]:
+        data[column] = data[column].str.replace(" ", "", regex=False).str.replace("\xa0", "", regex=False).astype(np.int64)
+    return data
+
+
+def read_csv_thousands(path):
+    return pd.read_csv(path, sep=";", encoding="utf-8-sig", header=None, skiprows=2, thousands=" ")
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--chunk-mb", type=float, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_official_") as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f"official_{rows}.csv")
+            write_official(path, rows)
+            size = os.path.getsize(path) / 2**20
+            print(f"{rows} rows, {size:.1f} MB")
+
+            results = {}
+            readers = [
+                ("read_csv + fixes", lambda: read_csv_with_fixes(path)),
+                ("read_csv thousands", lambda: read_csv_thousands(path)),
+                ("official_csv", lambda: read_official(path, chunk_bytes=int(args.chunk_mb * 2**20))),
+            ]
+            for name, reader in readers:
+                seconds, results[name] = best_of(reader, args.repeat)
+                print(f"  {name:<20} {seconds * 1e3:9.1f} ms  {size / seconds:7.1f} MB/s  {rows / seconds / 1e6:6.2f} M rows/s")
+
+            expected = results["read_csv + fixes"]
+            actual = results["official_csv"]
+            assert list(actual.columns) == list(expected.columns)
+            assert (actual.iloc[:, 1:].to_numpy() == expected.iloc[:, 1:].to_numpy()).all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Count data parses and snapshot lookups per dashboard page load.
+
+Loads a dashboard the way a browser does: the index page and every script,
+stylesheet and asset it links to, ``_dash-layout`` and ``_dash-dependencies``,
+then each server callback with the layout's initial values. Parses are
+calls to ``pd.read_excel``, ``pd.read_csv`` or a columnar sidecar read. Lookups
+are ``results_store.snapshot()`` calls, for apps that have one.
+
+Static requests should cost nothing. With ``--max-static 0`` the script
+exits non-zero if they parse or look up any data, so it can be used as a check:
+
+    python bench_page_load.py --app elections2 cnn augustanational --loads 3 --max-static 0
+"""
+import argparse
+import functools
+import importlib
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+import pandas as pd
+
+import columnar_cache
+
+
+counts = Counter()
+
+
+def counted(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        counts[name] += 1
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def install_counters():
+    pd.read_excel = counted("parses", pd.read_excel)
+    pd.read_csv = counted("parses", pd.read_csv)
+    columnar_cache._read_sidecar = counted("parses", columnar_cache._read_sidecar)
+
+
+def layout_values(layout):
+    """``{"id.property": value}`` for every component in a layout response."""
+    values = {}
+    stack = [layout]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            props = node.get("props", {})
+            if isinstance(props.get("id"), str):
+                for name, value in props.items():
+                    values[f"{props['id']}.{name}"] = value
+            stack.extend(v for v in props.values() if isinstance(v, (dict, list)))
+    return values
+
+
+def callback_body(dependency, values):
+    inputs = [
+        {"id": i["id"], "property": i["property"], "value": values.get(f"{i['id']}.{i['property']}")}
+        for i in dependency["inputs"]
+    ]
+    state = [
+        {"id": s["id"], "property": s["property"], "value": values.get(f"{s['id']}.{s['property']}")}
+        for s in dependency["state"]
+    ]
+    return {
+        "output": dependency["output"],
+        "outputs": None,
+        "inputs": inputs,
+        "state": state,
+        "changedPropIds": [],
+    }
+
+
+def page_load(client, lookups="lookups"):
+    """Request one page load; returns the parse and lookup counts by kind of request."""
+    per_kind = {"static": Counter(), "callbacks": Counter()}
+
+    def get(kind, url, method="get", **kwargs):
+        before = counts.copy()
+        response = getattr(client, method)(url, **kwargs)
+        added = counts - before
+        per_kind[kind]["parses"] += added["parses"]
+        per_kind[kind]["lookups"] += added[lookups]
+        per_kind[kind]["requests"] += 1
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method.upper()} {url}: HTTP {response.status_code}")
+        return response
+
+    index = get("static", "/").get_data(as_text=True)
+    for url in re.findall(r'(?:src|href)="(/[^"]+)"', index):
+        get("static", url)
+    layout = json.loads(get("static", "/_dash-layout").data)
+    dependencies = json.loads(get("static", "/_dash-dependencies").data)
+    for url in ["/assets/" + name for name in sorted(os.listdir("assets")) if not name.startswith(".")]:
+        get("static", url)
+
+    values = layout_values(layout)
+    for dependency in dependencies:
+        if not dependency.get("clientside_function"):
+            get("callbacks", "/_dash-update-component", method="post", json=callback_body(dependency, values))
+    return per_kind
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", nargs="+", default=["elections2"], help="dashboard modules to load")
+    parser.add_argument("--loads", type=int, default=3, help="page loads per app")
+    parser.add_argument("--max-static", type=int, help="fail if static requests parse or look up more than this")
+    args = parser.parse_args()
+
+    install_counters()
+    failed = False
+    for name in args.app:
+        module = importlib.import_module(name)
+        store = getattr(module, "results_store", None)
+        if store is not None:
+            # Keyed by app, as other apps' background threads keep looking up theirs
+            store.snapshot = counted(f"lookups:{name}", store.snapshot)
+        client = module.app.server.test_client()
+
+        for load in range(1, args.loads + 1):
+            per_kind = page_load(client, f"lookups:{name}")
+            line = [f"{name} load {load}:"]
+            for kind, kind_counts in per_kind.items():
+                line.append(
+                    f"{kind} {kind_counts['requests']:3d} requests, "
+                    f"{kind_counts['parses']:3d} parses, {kind_counts['lookups']:3d} lookups"
+                )
+            print("  ".join(line))
+            static = per_kind["static"]
+            if args.max_static is not None and static["parses"] + static["lookups"] > args.max_static:
+                failed = True
+
+    if failed:
+        sys.exit(f"static requests did more than {args.max_static} parses and lookups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Old melt-based process_data against results_transform at 45, 550 and 50k rows.
+
+    python bench_process_data.py
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from results_transform import CANDIDATES, WideResults
+
+
+def legacy_process_data(data):
+    # process_data as it was in elections2.py
+    df = data.copy()
+    candidates = CANDIDATES
+
+    for candidate in candidates:
+        df[candidate] = pd.to_numeric(df[candidate], errors='coerce')
+
+    df = df[df["Votes"] > 0]
+    df = df.dropna(subset=candidates)
+
+    for candidate in candidates:
+        df[f"{candidate}"] = df[candidate] / df["Votes"] * 100
+
+    df = pd.melt(df, id_vars=["Department", "Votes"], value_vars=[f"{candidate}" for candidate in candidates], var_name="Candidate", value_name="Percentage")
+
+    return df
+
+
+def department_rows(count, base, seed=0):
+    """``count`` rows cycled from ``base`` with jittered counts and unique department names."""
+    rng = np.random.default_rng(seed)
+    data = base.iloc[np.arange(count) % len(base)].reset_index(drop=True)
+    data["Department"] = data["Department"] + "-" + (np.arange(count) // len(base)).astype(str)
+    for column in CANDIDATES:
+        data[column] = (data[column] * rng.uniform(0.8, 1.2, count)).round().astype(np.int64)
+    data["Votes"] = data[CANDIDATES].sum(axis=1)
+    return data
+
+
+def best_of(func, repeat, number):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[45, 550, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    base = pd.read_excel("elections_senegal.xlsx")
+    print(f"{'rows':>8} {'legacy ms':>10} {'wide ms':>10} {'wide+tidy ms':>13} {'speedup':>8}")
+    for size in args.sizes:
+        data = department_rows(size, base)
+        pd.testing.assert_frame_equal(legacy_process_data(data), WideResults.from_frame(data).tidy)
+
+        number = max(1, 20000 // size)
+        legacy = best_of(lambda: legacy_process_data(data), args.repeat, number)
+        wide = best_of(lambda: WideResults.from_frame(data), args.repeat, number)
+        tidy = best_of(lambda: WideResults.from_frame(data).tidy, args.repeat, number)
+        print(f"{size:>8} {legacy * 1e3:>10.3f} {wide * 1e3:>10.3f} {tidy * 1e3:>13.3f} {legacy / tidy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
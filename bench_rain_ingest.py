@@ -0,0 +1,90 @@
+"""Throughput and memory of rain_ingest against pd.read_csv plus per-cell fixes.
+
+Writes ``rain_data.csv``-format files (``;``, BOM, ``04.May`` and decimal-comma
+readings) with ``--rows`` readings, repeating the sample's rows. Then reads
+each file in two ways:
+
+* ``read_csv + apply``: the whole file as text, each cell repaired by a
+  Python function, default dtypes
+* ``rain_ingest``: ``--chunk-rows`` rows at a time, repaired on distinct
+  values, compact dtypes
+
+and prints the time and the size of the frame in memory:
+
+    python bench_rain_ingest.py --rows 100000 1000000
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import pandas as pd
+
+from rain_ingest import FEATURES, MONTHS, read_rain
+
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rain_data.csv")
+
+
+def write_rain(path, rows):
+    with open(SAMPLE, "rb") as f:
+        lines = f.read().splitlines()
+    header, body = lines[0], lines[1:]
+    with open(path, "wb") as f:
+        f.write(header + b"\n")
+        for start in range(0, rows, len(body)):
+            f.write(b"\n".join(body[:rows - start]) + b"\n")
+
+
+def repair_cell(text):
+    if not isinstance(text, str):
+        return text
+    match = re.match(r"^(\d+)\.([A-Za-z]+)$", text.strip())
+    if match:
+        month = MONTHS[match.group(2).lower()]
+        return int(match.group(1)) + month / (100 if month >= 10 else 10)
+    return float(text.replace(",", "."))
+
+
+def read_csv_with_apply(path):
+    data = pd.read_csv(path, sep=";", encoding="utf-8-sig", dtype=str)
+    for column in FEATURES:
+        data[column] = data[column].map(repair_cell)
+    data["Timestamp"] = pd.to_datetime(data["Timestamp"], format="%d.%m.%Y %H:%M")
+    data["Flood_Status"] = data["Flood_Status"].map({"No": 0, "Yes": 1})
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_rain_") as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f"rain_{rows}.csv")
+            write_rain(path, rows)
+            print(f"{rows} rows, {os.path.getsize(path) / 2**20:.1f} MB")
+
+            results = {}
+            readers = [
+                ("read_csv + apply", lambda: read_csv_with_apply(path)),
+                ("rain_ingest", lambda: read_rain(path, args.chunk_rows)),
+            ]
+            for name, reader in readers:
+                started = time.perf_counter()
+                results[name] = reader()
+                seconds = time.perf_counter() - started
+                size = results[name].memory_usage(deep=True).sum() / 2**20
+                print(f"  {name:<18} {seconds * 1e3:9.1f} ms  {rows / seconds / 1e6:6.2f} M rows/s  {size:8.1f} MB in memory")
+
+            expected = results["read_csv + apply"][FEATURES].astype("float32")
+            actual = results["rain_ingest"][FEATURES]
+            assert (actual.to_numpy() == expected.to_numpy()).all()
+            assert (actual.index == expected.index).all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Throughput of the batch sentiment pipeline for 1, 2, 4 and N workers.
+
+    python bench_sentiment.py --comments 20000
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sentiment import get_analyzer
+from sentiment_pipeline import score_parallel
+
+
+WORDS = [
+    "Sonko", "Macky", "Idy", "Niang", "Issa", "mandat", "bravo", "non", "oui", "perfect", "great",
+    "bad", "terrible", "good", "love", "hate", "vote", "election", "Senegal", "Dakar", "victoire",
+    "fraude", "merci", "honte", "espoir", "jeunesse", "happy", "sad", "strong", "weak", "2019",
+]
+
+
+def synthetic_comments(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(3, 20))) + f" #{i}" for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    texts = synthetic_comments(args.comments)
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    print(f"{'workers':>8} {'seconds':>10} {'comments/s':>12}")
+    for workers in worker_counts:
+        if workers == 1:
+            get_analyzer()
+            start = time.perf_counter()
+            score_parallel(texts, 1, args.chunk_size)
+        else:
+            # Pool start-up (and lexicon loading) is excluded, as in --follow mode
+            with ProcessPoolExecutor(max_workers=workers, initializer=get_analyzer) as pool:
+                list(pool.map(abs, range(workers)))
+                start = time.perf_counter()
+                score_parallel(texts, workers, args.chunk_size, pool)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {elapsed:>10.2f} {len(texts) / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
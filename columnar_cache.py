@@ -0,0 +1,310 @@
+"""Columnar sidecar cache for the xlsx/csv sources.
+
+The first read of ``data.xlsx`` parses it normally and writes every column
+to ``data.xlsx.cache/`` as a ``.npy`` file next to a ``manifest.json``.
+Later reads memory-map those files (copy-on-write, so the frame stays
+writable and the files untouched) instead of going through openpyxl, and
+numeric and datetime columns go into the DataFrame without a copy.
+String columns are stored dictionary-encoded: small integer codes plus the
+distinct strings as UTF-8 bytes and offsets. A read builds each distinct
+string once and shares it between rows. Columns mixing strings, numbers
+and dates (as Excel gives) are stored the same way, each distinct value
+tagged with its type. Nothing is pickled; a column holding any other kind
+of object leaves the source uncached. The manifest records a SHA-256 of
+the source bytes, so an edited source is detected and re-parsed; a plain
+``touch`` only costs one re-hash.
+"""
+import datetime
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_SUFFIX = ".cache"
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 3
+
+# Types a mixed column may hold, by the tag its values are stored under.
+# Subclasses come first: a Timestamp is a datetime, a datetime a date.
+MIXED_TYPES = [
+    ("T", pd.Timestamp, pd.Timestamp),
+    ("d", datetime.datetime, datetime.datetime.fromisoformat),
+    ("D", datetime.date, datetime.date.fromisoformat),
+    ("t", datetime.time, datetime.time.fromisoformat),
+    ("b", bool, lambda text: text == "True"),
+    ("i", int, int),
+    ("f", float, float),
+    ("s", str, str),
+]
+
+
+def cache_dir(path):
+    return str(path) + CACHE_SUFFIX
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_reader(path):
+    if str(path).lower().endswith(".csv"):
+        return pd.read_csv
+    return pd.read_excel
+
+
+def _reader_key(reader, kwargs):
+    # Different reader options give different frames, so they are part of the key
+    name = getattr(reader, "__qualname__", repr(reader))
+    return json.dumps([name, sorted((k, repr(v)) for k, v in kwargs.items())])
+
+
+def _load_manifest(directory, any_format=False):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get("format") != FORMAT_VERSION and not any_format:
+        return None
+    return manifest
+
+
+def _write_manifest(directory, manifest):
+    tmp = os.path.join(directory, f".{MANIFEST}.{uuid.uuid4().hex}")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(directory, MANIFEST))
+
+
+def _code_dtype(count):
+    # Signed, so -1 can mark a missing value
+    for dtype in (np.int8, np.int16, np.int32):
+        if count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_strings(values):
+    """Codes into the distinct strings, stored as UTF-8 bytes and their offsets."""
+    codes, uniques = pd.factorize(values)
+    encoded = [value.encode("utf-8") for value in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {
+        "codes": codes.astype(_code_dtype(len(uniques))),
+        "offsets": offsets,
+        "bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+
+def _decode_strings(arrays):
+    raw = arrays["bytes"].tobytes()
+    offsets = arrays["offsets"].tolist()
+    uniques = [raw[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+    # Code -1 (missing) picks the trailing NaN
+    return np.array(uniques + [np.nan], dtype=object)[arrays["codes"]]
+
+
+PARSERS = {tag: parse for tag, _, parse in MIXED_TYPES}
+
+
+def _tag(value):
+    for tag, kind, _ in MIXED_TYPES:
+        if isinstance(value, kind):
+            if hasattr(value, "isoformat"):
+                return tag + value.isoformat()
+            # repr round-trips floats exactly
+            return tag + (repr(float(value)) if kind is float else str(value))
+    raise TypeError(f"{type(value).__name__} values can't be stored in the cache")
+
+
+def _untag(text):
+    return PARSERS[text[0]](text[1:])
+
+
+def _encode_mixed(values, missing):
+    tagged = values.copy()
+    distinct = {}
+    for position in np.flatnonzero(~missing):
+        value = values[position]
+        # Keyed by type too: 1, 1.0 and True are equal but stored apart
+        key = (type(value), value)
+        if key not in distinct:
+            distinct[key] = _tag(value)
+        tagged[position] = distinct[key]
+    return _encode_strings(tagged)
+
+
+def _decode_mixed(arrays):
+    raw = arrays["bytes"].tobytes()
+    offsets = arrays["offsets"].tolist()
+    uniques = [_untag(raw[start:end].decode("utf-8")) for start, end in zip(offsets[:-1], offsets[1:])]
+    values = np.empty(len(uniques) + 1, dtype=object)
+    values[:-1] = uniques
+    values[-1] = np.nan
+    return values[arrays["codes"]]
+
+
+def _encode_column(series):
+    """Split a column into mmap-able arrays plus the metadata to rebuild it."""
+    meta = {"dtype": str(series.dtype)}
+    arrays = {}
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        meta["kind"] = "category"
+        meta["ordered"] = bool(series.cat.ordered)
+        arrays["codes"] = series.cat.codes.to_numpy()
+        arrays["categories"] = np.asarray(series.cat.categories.astype(str), dtype=str)
+    elif isinstance(series.dtype, pd.DatetimeTZDtype):
+        meta["kind"] = "datetimetz"
+        meta["tz"] = str(series.dt.tz)
+        arrays["values"] = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+    elif pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+        meta["kind"] = "plain"
+        arrays["values"] = series.to_numpy()
+    else:
+        values = series.to_numpy(dtype=object)
+        missing = pd.isna(values)
+        if all(isinstance(v, str) for v in values[~missing]):
+            meta["kind"] = "string"
+            arrays.update(_encode_strings(values))
+        else:
+            meta["kind"] = "mixed"
+            arrays.update(_encode_mixed(values, missing))
+
+    return meta, arrays
+
+
+def _decode_column(meta, arrays):
+    kind = meta["kind"]
+    if kind == "category":
+        return pd.Categorical.from_codes(arrays["codes"], categories=arrays["categories"], ordered=meta["ordered"])
+    if kind == "datetimetz":
+        return pd.DatetimeIndex(arrays["values"]).tz_localize("UTC").tz_convert(meta["tz"])
+    if kind == "string":
+        return _decode_strings(arrays)
+    if kind == "mixed":
+        return _decode_mixed(arrays)
+    return arrays["values"]
+
+
+def write_cache(path, data, reader=None, **kwargs):
+    """Write ``data`` as the sidecar for ``path`` (which must already exist).
+
+    Raises TypeError, before writing anything, for a column the cache can't store.
+    """
+    reader = reader or default_reader(path)
+    frame = data
+    keep_index = not (isinstance(frame.index, pd.RangeIndex) and frame.index.start == 0 and frame.index.step == 1)
+    if keep_index:
+        frame = frame.reset_index(names="__index__")
+    encoded = [_encode_column(frame.iloc[:, position]) for position in range(frame.shape[1])]
+
+    directory = cache_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    # Files of an older format are replaced too
+    old = _load_manifest(directory, any_format=True)
+
+    st = os.stat(path)
+    prefix = uuid.uuid4().hex[:12]
+    columns = []
+    for position, (name, (meta, arrays)) in enumerate(zip(frame.columns, encoded)):
+        meta["name"] = name
+        meta["files"] = {}
+        for part, array in arrays.items():
+            filename = f"{prefix}-{position}-{part}.npy"
+            np.save(os.path.join(directory, filename), array, allow_pickle=False)
+            meta["files"][part] = filename
+        columns.append(meta)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "reader": _reader_key(reader, kwargs),
+        "source_sha256": file_hash(path),
+        "source_mtime_ns": st.st_mtime_ns,
+        "source_size": st.st_size,
+        "rows": len(frame),
+        "index": "__index__" if keep_index else None,
+        "index_name": data.index.name if keep_index else None,
+        "columns": columns,
+    }
+    _write_manifest(directory, manifest)
+
+    # Readers that already opened the old files keep their mappings
+    if old is not None:
+        for column in old["columns"]:
+            for filename in column["files"].values():
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except FileNotFoundError:
+                    pass
+    return manifest
+
+
+def _is_current(path, manifest, reader_key):
+    if manifest is None or manifest["reader"] != reader_key:
+        return False
+    st = os.stat(path)
+    if (st.st_mtime_ns, st.st_size) == (manifest["source_mtime_ns"], manifest["source_size"]):
+        return True
+    if st.st_size != manifest["source_size"] or file_hash(path) != manifest["source_sha256"]:
+        return False
+    # Same bytes, new mtime: remember it so the next check skips the hash
+    manifest["source_mtime_ns"] = st.st_mtime_ns
+    _write_manifest(cache_dir(path), manifest)
+    return True
+
+
+def _read_sidecar(path, manifest):
+    directory = cache_dir(path)
+    columns = {}
+    for meta in manifest["columns"]:
+        arrays = {
+            part: np.load(os.path.join(directory, filename), mmap_mode="c", allow_pickle=False)
+            for part, filename in meta["files"].items()
+        }
+        columns[meta["name"]] = _decode_column(meta, arrays)
+
+    index = None
+    if manifest["index"] is not None:
+        index = pd.Index(columns.pop(manifest["index"]), name=manifest["index_name"])
+    names = [meta["name"] for meta in manifest["columns"] if meta["name"] != manifest["index"]]
+    # copy=False keeps the mapped arrays as the column blocks
+    return pd.DataFrame(columns, columns=names, index=index, copy=False)
+
+
+def read_cached(path, reader=None, **kwargs):
+    """Read ``path`` through its sidecar, (re)building the sidecar when stale."""
+    reader = reader or default_reader(path)
+    reader_key = _reader_key(reader, kwargs)
+    manifest = _load_manifest(cache_dir(path))
+    if _is_current(path, manifest, reader_key):
+        try:
+            return _read_sidecar(path, manifest)
+        except FileNotFoundError:
+            # Lost a race with a writer replacing the column files
+            pass
+
+    data = reader(path, **kwargs)
+    try:
+        write_cache(path, data, reader, **kwargs)
+    except (OSError, TypeError):
+        # A read-only checkout, or a column the cache can't store: read uncached
+        pass
+    return data
+
+
+def build_cache(path, reader=None, **kwargs):
+    """Parse ``path`` and write its sidecar; used by the scripts that generate sources."""
+    reader = reader or default_reader(path)
+    data = reader(path, **kwargs)
+    write_cache(path, data, reader, **kwargs)
+    return data
@@ -1,46 +1,95 @@
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
 
-# Load your combined dataset (replace with your actual data file)
-data = pd.read_excel('rain_data.xlsx')
-
-# Define input features and target variable
-features = ['Rainfall_mm', 'Temperature_C', 'Wind_Speed_kmph', 'Elevation_m', 'Population_Density', 'Flood_History_Count']
-target = 'Flood_Status'
-
-# Prepare the dataset
-X = data[features]
-y = data[target]
-
-# Encode the target variable (Flood_Status) as binary (0: No, 1: Yes)
-y = y.map({'No': 0, 'Yes': 1})
-
-# Split the dataset into training, validation, and test sets
-X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=0.3, random_state=42)
-X_val, X_test, y_val, y_test = train_test_split(X_temp, y_temp, test_size=0.5, random_state=42)
-
-# Standardize the input features
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_val = scaler.transform(X_val)
-X_test = scaler.transform(X_test)
-
-# Train the model using RandomForestClassifier
-clf = RandomForestClassifier(n_estimators=100, random_state=42)
-clf.fit(X_train, y_train)
-
-# Validate the model
-y_val_pred = clf.predict(X_val)
-print("Validation set results:")
-print(classification_report(y_val, y_val_pred))
-print(confusion_matrix(y_val, y_val_pred))
-
-# Test the model
-y_test_pred = clf.predict(X_test)
-print("Test set results:")
-print(classification_report(y_test, y_test_pred))
-print(confusion_matrix(y_test, y_test_pred))
+from rain_ingest import CHUNK_ROWS, FEATURES, TARGET, iter_rain
+
+# Hourly readings of every Dakar area; read CHUNK_ROWS at a time, so years
+# of readings train in the memory of one chunk
+DATA = 'rain_data.csv'
+N_ESTIMATORS = 100
+
+
+def readings(path=DATA, chunk_rows=CHUNK_ROWS):
+    """Features, target and split (0: train, 1: validation, 2: test) per chunk."""
+    for i, chunk in enumerate(iter_rain(path, chunk_rows)):
+        chunk = chunk[chunk[TARGET] >= 0].dropna(subset=FEATURES)
+        # 70% train, 15% validation, 15% test, the same on every pass
+        draws = np.random.default_rng([42, i]).random(len(chunk))
+        split = np.digitize(draws, [0.7, 0.85])
+        yield chunk[FEATURES].to_numpy(), chunk[TARGET].to_numpy(), split
+
+
+def fit_points(chunk_classes):
+    """Whether the second pass fits after each chunk.
+
+    A chunk with only one class waits for the next, so all trees see both.
+    """
+    points, waiting = [], set()
+    for classes in chunk_classes:
+        waiting |= classes
+        points.append(len(waiting) >= 2)
+        if points[-1]:
+            waiting = set()
+    return points
+
+
+def train(chunks, n_estimators=N_ESTIMATORS):
+    """The scaler and RandomForestClassifier for the training rows of ``chunks()``."""
+    # First pass: standardize the input features with the training rows'
+    # statistics, and note the classes each chunk trains on
+    scaler = StandardScaler()
+    chunk_classes = []
+    for X, y, split in chunks():
+        if (split == 0).any():
+            scaler.partial_fit(X[split == 0])
+        chunk_classes.append(set(np.unique(y[split == 0]).tolist()))
+
+    # Second pass: grow trees on each chunk, n_estimators in all. The trees
+    # are spread over the fits the chunks actually make; a fit that would
+    # get none passes its rows on to the next one.
+    points = fit_points(chunk_classes)
+    fits = sum(points)
+    if not fits:
+        raise ValueError("the training rows hold fewer than two classes")
+    shares = [n_estimators * (k + 1) // fits - n_estimators * k // fits for k in range(fits)]
+    clf = RandomForestClassifier(n_estimators=0, warm_start=True, random_state=42)
+    pending_X, pending_y = [], []
+    fit = 0
+    for (X, y, split), point in zip(chunks(), points):
+        pending_X.append(X[split == 0])
+        pending_y.append(y[split == 0])
+        if not point:
+            continue
+        fit += 1
+        if shares[fit - 1] == 0:
+            continue
+        clf.n_estimators += shares[fit - 1]
+        clf.fit(scaler.transform(np.concatenate(pending_X)), np.concatenate(pending_y))
+        pending_X, pending_y = [], []
+    return scaler, clf
+
+
+def main():
+    scaler, clf = train(readings)
+
+    # Third pass: validate and test the model
+    y_true = {1: [], 2: []}
+    y_pred = {1: [], 2: []}
+    for X, y, split in readings():
+        for part in (1, 2):
+            if (split == part).any():
+                y_true[part].append(y[split == part])
+                y_pred[part].append(clf.predict(scaler.transform(X[split == part])).astype(np.int8))
+
+    for part, name in ((1, "Validation"), (2, "Test")):
+        y_part, y_part_pred = np.concatenate(y_true[part]), np.concatenate(y_pred[part])
+        print(f"{name} set results:")
+        print(classification_report(y_part, y_part_pred))
+        print(confusion_matrix(y_part, y_part_pred))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Canonical departments and candidates with stable integer codes.
+
+The same department or candidate reaches us under several spellings:
+"Ousmane Sonko", "Ousmane_Sonko", "Ousmane SONKO"; "Thiès" and "Thies";
+and "DÃ©partement" when a UTF-8 csv was read as Latin-1. A ``Dimension``
+maps every spelling to one code. Filters, group-bys and rollups then run
+on small integer arrays, and labels are only looked up again for display.
+
+Codes are assigned in the order labels are registered and never change
+within a process. Canonical departments and candidates are registered at
+import, so their codes are the same in every worker.
+"""
+import threading
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+CANDIDATES = ["Macky SALL", "Idrissa SECK", "Ousmane Sonko", "Madické NIANG", "El hadji SALL"]
+
+# The 14 regions and their 45 departments, in the order the results files use
+REGIONS = {
+    "Dakar": ["Dakar", "Guediawaye", "Pikine", "Rufisque"],
+    "Diourbel": ["Bambey", "Diourbel", "Mbacke"],
+    "Fatick": ["Fatick", "Foundiougne", "Gossas"],
+    "Kaffrine": ["Birkilane", "Kaffrine", "Koungheul", "Malem Hodar"],
+    "Kaolack": ["Guinguineo", "Kaolack", "Nioro du Rip"],
+    "Kedougou": ["Kedougou", "Salemata", "Saraya"],
+    "Kolda": ["Kolda", "Medina Yoro Foulah", "Velingara"],
+    "Louga": ["Kebemer", "Linguere", "Louga"],
+    "Matam": ["Kanel", "Matam", "Ranerou"],
+    "Saint-Louis": ["Dagana", "Podor", "Saint-Louis"],
+    "Sedhiou": ["Bounkiling", "Goudomp", "Sedhiou"],
+    "Tambacounda": ["Bakel", "Goudiry", "Koumpentoum", "Tambacounda"],
+    "Thies": ["Mbour", "Thies", "Tivaouane"],
+    "Ziguinchor": ["Bignona", "Oussouye", "Ziguinchor"],
+}
+
+# Headers of the official results csv and the names the dashboards use
+COLUMN_ALIASES = {
+    "Département": "Department",
+    "Nbre bureaux": "Number of offices",
+    "Inscrits": "Registered",
+    "Votants": "Voters",
+    "Exprimés": "Votes",
+    "Ousmane SONKO": "Ousmane Sonko",
+}
+
+
+def repair_encoding(text):
+    """Undo UTF-8 text that was decoded as Latin-1 ("DÃ©partement")."""
+    if "Ã" not in text and "Â" not in text:
+        return text
+    try:
+        return text.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return text
+
+
+@lru_cache(maxsize=4096)
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", repair_encoding(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.replace("_", " ").replace("-", " ").split()).casefold()
+
+
+def normalize_label(text):
+    """Comparison key: no accents, case, underscores, hyphens or extra spaces."""
+    return _normalize(str(text))
+
+
+class Dimension:
+    """Labels of one kind and their integer codes; any spelling finds its code."""
+
+    def __init__(self, name, labels=(), aliases=None):
+        self.name = name
+        self.labels = []
+        self._codes = {}
+        self._lock = threading.Lock()
+        for label in labels:
+            self.add(label)
+        for alias, label in (aliases or {}).items():
+            self._codes[normalize_label(alias)] = self._codes[normalize_label(label)]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, label):
+        key = normalize_label(label)
+        with self._lock:
+            code = self._codes.get(key)
+            if code is None:
+                code = len(self.labels)
+                self._codes[key] = code
+                self.labels.append(repair_encoding(str(label)))
+            return code
+
+    def code(self, label, add=False):
+        """Code of ``label``; unknown labels are added, or are -1 unless ``add``."""
+        if label is None or label != label:
+            return -1
+        code = self._codes.get(normalize_label(label))
+        if code is None:
+            return self.add(label) if add else -1
+        return code
+
+    def label(self, label):
+        """Canonical spelling of ``label``, or ``label`` itself if unknown."""
+        code = self.code(label)
+        return self.labels[code] if code >= 0 else label
+
+    def encode(self, values, add=False):
+        """Codes for an array of labels; only the distinct values are normalized."""
+        if isinstance(values, pd.Categorical):
+            uniques, inverse = values.categories, values.codes
+        else:
+            inverse, uniques = pd.factorize(np.asarray(values, dtype=object))
+        lookup = np.array([self.code(value, add) for value in uniques] + [-1], dtype=np.int32)
+        # factorize marks missing values -1, which picks the trailing -1 above
+        return lookup[inverse]
+
+    def codes(self, labels):
+        """Codes for a short list of labels, such as a dropdown selection."""
+        return np.array([self.code(label) for label in labels], dtype=np.int64)
+
+    def decode(self, codes):
+        labels = np.array(self.labels + [None], dtype=object)
+        return labels[np.asarray(codes)]
+
+    def categorical(self, codes):
+        """A pandas Categorical over every label of the dimension."""
+        return pd.Categorical.from_codes(np.asarray(codes), categories=self.labels)
+
+
+department_codes = Dimension("Department", [name for names in REGIONS.values() for name in names])
+candidate_codes = Dimension("Candidate", CANDIDATES)
+region_codes = Dimension("Region", REGIONS)
+
+
+def canonical_columns(frame):
+    """Rename known header spellings (French headers, candidate variants)."""
+    renames = {}
+    aliases = {normalize_label(alias): name for alias, name in COLUMN_ALIASES.items()}
+    for column in frame.columns:
+        key = normalize_label(column)
+        if key in aliases:
+            renames[column] = aliases[key]
+        elif candidate_codes.code(column) >= 0:
+            renames[column] = candidate_codes.label(column)
+    return frame.rename(columns=renames)
@@ -7,53 +7,45 @@ from dash import html, dcc
 from dash.dependencies import Input, Output
 import plotly.express as px
 import plotly.graph_objs as go
-import time
-import threading
+from columnar_cache import read_cached
+from ingest import CsvTail, ResultsAggregator
+from refresher import Refresher
+from filter_index import frame_mask
+from results_transform import WideResults
+from geometry import load_boundaries
 
 mapbox_access_token = "your_mapbox_access_token_here"
 excel_path = "elections_senegal_with_timestamps.csv"
-example_data = pd.read_csv(excel_path)
+example_data = read_cached(excel_path)
 
-with open("senegal.geojson", "r") as file:
-    senegal_geojson = json.load(file)
+# Simplified once per process
+senegal_geojson = load_boundaries()
 
 data = example_data.copy()
 
-def update_data():
-    global data
-    while True:
-        data = pd.read_csv(excel_path)
-        data['Timestamp'] = pd.Timestamp.now()
-        time.sleep(5)
+# Only rows appended to the csv are parsed; aggregates move by the delta
+results_tail = CsvTail(excel_path)
+results_aggregator = ResultsAggregator(
+    ["Votes", "Macky_SALL", "Idrissa_SECK", "Ousmane_Sonko", "Madické_NIANG", "El_hadji_SALL"]
+)
+
+def refresh_results():
+    # None while the csv hasn't grown; the refresher keeps serving the last frame
+    new_rows = results_tail.read_new()
+    if new_rows is None:
+        return None
+    new_rows['Timestamp'] = pd.Timestamp.now()
+    results_aggregator.apply(new_rows)
+    return results_aggregator.by_department()
 
-data_updater = threading.Thread(target=update_data)
-data_updater.start()
+# One process per host tails the csv; the other workers load its snapshots
+results_refresher = Refresher(refresh_results, "elections_results", initial=data, source=excel_path).start()
 
 def process_data(data):
     candidates = ["Macky_SALL", "Idrissa_SECK", "Ousmane_Sonko", "Madické_NIANG", "El_hadji_SALL"]
-    df = pd.DataFrame(data)
-    
-    # Drop the existing 'Percentage' column
-    if 'Percentage' in df.columns:
-        df = df.drop(columns=['Percentage'])
-    
-    # Calculate the total votes for each department
-    df['TotalVotes'] = df[candidates].sum(axis=1)
-    
-    # Calculate the percentage of votes for each candidate
-    for candidate in candidates:
-        df[f"{candidate}_Percentage"] = df[candidate] / df['TotalVotes'] * 100
-    
-    # Melt the DataFrame to make it tidy
-    df = pd.melt(df, id_vars=["Department", "Votes"], value_vars=[f"{candidate}_Percentage" for candidate in candidates], var_name="Candidate", value_name="Percentage")
-    
-    # Remove the "_Percentage" suffix from the candidate names
-    df['Candidate'] = df['Candidate'].str.replace("_Percentage", "")
-    
-    print("DataFrame columns:", df.columns)
-    print("Candidates list:", candidates)
-    
-    return df
+
+    # Percentages of the candidates' combined votes, all candidates at once
+    return WideResults.from_frame(pd.DataFrame(data), candidates, total=None, drop_invalid=False).tidy
 
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
@@ -189,13 +181,10 @@ def generate_candidate_info(data, api_data, candidate_colors):
     ],
 )
 def update_dashboard(selected_departments, selected_candidates):
-    filtered_data = data.copy()
-
-    if selected_departments is not None and len(selected_departments) > 0:
-        filtered_data = filtered_data[filtered_data["Department"].isin(selected_departments)]
+    data = results_refresher.current().value
 
-    if selected_candidates is not None and len(selected_candidates) > 0:
-        filtered_data = filtered_data[filtered_data["Candidate"].isin(selected_candidates)]
+    # Bitmaps per department and candidate, built once per data update
+    filtered_data = data[frame_mask(data, Department=selected_departments, Candidate=selected_candidates)]
 
     candidate_info = generate_candidate_info(filtered_data, candidate_colors)
 
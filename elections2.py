@@ -1,15 +1,29 @@
 import os
 import json
+import hashlib
 import pandas as pd
 import dash
 import dash_bootstrap_components as dbc
-from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash import html, dcc, no_update
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import plotly.express as px
 import plotly.graph_objs as go
 import datetime
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from dash import dash_table
+from results_store import ResultsStore, read_results
+from columnar_cache import read_cached
+from sentiment import ScoreStore, SentimentEngine, get_analyzer
+from replay_clock import ReplayClock
+from results_transform import CANDIDATES, WideResults, process_data
+from figure_cache import FigureCache, make_key
+import fast_figures
+from geometry import feature_ids, feature_index, load_boundaries, missing_features
+from live_channel import LiveChannel
+from tick import TickCache
+from server_store import ServerStore
+from filter_index import frame_mask
+import instrumentation
+from instrumentation import stage, timed
 
 #from flask import Flask
 #server = Flask(__name__)
@@ -18,29 +32,25 @@ from dash import dash_table
 # Replace this with your Mapbox access token
 mapbox_access_token = "your_mapbox_access_token_here"
 
-# Replace example_data with your actual data
-example_data = pd.read_excel("new_elections_data.xlsx")
+# Data files; the environment can point the app at other (e.g. generated) data
+RESULTS_PATH = os.environ.get("ELECTIONS_RESULTS", "new_elections_data.xlsx")
+COMMENTS_PATH = os.environ.get("ELECTIONS_COMMENTS", "comments_data.xlsx")
+SCORES_PATH = os.environ.get("ELECTIONS_SCORES", "sentiment_scores.bin")
 
-# Add Senegal GeoJSON data
-senegal_geojson = json.load(open("senegal.geojson", "r"))
+# Parsed once and reloaded only when the file changes
+results_store = ResultsStore(RESULTS_PATH, loader=read_results)
 
-def process_data(data):
-    df = data.copy()
-    candidates = ["Macky SALL", "Idrissa SECK", "Ousmane Sonko", "Madické NIANG", "El hadji SALL"]
-    
-    for candidate in candidates:
-        df[candidate] = pd.to_numeric(df[candidate], errors='coerce')
-    
-    df = df[df["Votes"] > 0]
-    df = df.dropna(subset=candidates)
-    
-    for candidate in candidates:
-        df[f"{candidate}"] = df[candidate] / df["Votes"] * 100
+# Replace example_data with your actual data
+example_data = results_store.snapshot().data
 
-    df = pd.melt(df, id_vars=["Department", "Votes"], value_vars=[f"{candidate}" for candidate in candidates], var_name="Candidate", value_name="Percentage")
-    
-    return df
+# Comments are scored once per distinct text and aggregated incrementally
+comments_store = ResultsStore(COMMENTS_PATH, loader=read_cached)
+sentiment_engine = SentimentEngine()
+# Scores written by sentiment_pipeline.py, picked up as they are appended
+score_store = ScoreStore(SCORES_PATH)
 
+# Add Senegal GeoJSON data (simplified once per process)
+senegal_geojson = load_boundaries()
 
 external_stylesheets = [
     dbc.themes.BOOTSTRAP,
@@ -52,65 +62,141 @@ external_stylesheets = [
 app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 server= app.server
 
-@app.server.before_request
-def before_request():
-    global api_data
-    api_data = get_live_data()
+# Department names (any spelling) to their boundary features
+boundary_index = feature_index(senegal_geojson)
+# Cached map figures hold feature ids, so they are keyed by the boundaries too
+boundary_version = hashlib.sha1(
+    json.dumps(sorted((name, str(feature["id"])) for name, feature in boundary_index.items())).encode("utf-8")
+).hexdigest()[:12]
+_unmapped = {}
 
 
-current_row_index = 0
+def departments_without_boundaries(snapshot=None):
+    """Departments in the results that the map has no feature for."""
+    snapshot = snapshot or results_store.snapshot()
+    if snapshot.fingerprint not in _unmapped:
+        _unmapped.clear()
+        _unmapped[snapshot.fingerprint] = missing_features(snapshot.data["Department"].dropna().unique(), boundary_index)
+    return _unmapped[snapshot.fingerprint]
 
 
-import pytz
+def boundary_metrics():
+    return {"features": len(senegal_geojson["features"]), "departments_without_boundaries": len(departments_without_boundaries())}
 
-def get_live_data():
-    global current_row_index
 
+unmapped_departments = departments_without_boundaries()
+if unmapped_departments:
+    # The map leaves these blank; usually a boundaries file without departments
+    server.logger.warning(
+        "%d departments have no boundary feature, e.g. %s",
+        len(unmapped_departments),
+        ", ".join(unmapped_departments[:5]),
+    )
+
+# Replay position derived from wall time, shared by all workers on the host
+replay_clock = ReplayClock()
+
+# Rendered figures, shared with the other workers through a cache directory
+figure_cache = FigureCache()
+
+# Large intermediate data; the browser only holds keys into it
+server_store = ServerStore()
+RESULTS_TABLE_PAGE_SIZE = 20
+
+
+def get_live_position():
     # Replace with the actual API or data source
-    data = pd.read_excel("new_elections_data.xlsx")
+    # (Timestamps are already converted to timezone-aware values by read_results)
+    snapshot = results_store.snapshot()
+
+    # Rows reported up to the replay time; the same answer in every worker
+    rows = snapshot.rows_as_of(replay_clock.replay_time(snapshot.start))
+    return snapshot, rows
 
-    # Convert the Timestamp column to timezone-aware timestamps
-    data['Timestamp'] = pd.to_datetime('2022-04-10 ' + data['Timestamp'], utc=True, format="%Y-%m-%d %H:%M:%S")
 
-    # Filter data based on the current row index and the timestamp column
-    filtered_data = data.iloc[:current_row_index+1]  # Add +1 here
+# Derived views shared by every callback that reads the same tick
+ticks = TickCache(get_live_position)
 
-    # Update the current row index
-    current_row_index += 1
-    if current_row_index > len(data):
-        current_row_index = len(data)
 
-    return filtered_data
+def get_live_view():
+    tick = ticks.current()
+    return tick.version, tick.data
+
+
+def get_live_data():
+    return get_live_view()[1]
+
+
+def live_event(previous):
+    """The push event for the current data, or None if it hasn't changed."""
+    tick = ticks.current()
+    snapshot, rows, results = tick.snapshot, tick.rows, tick.version
+    sentiment = f"{comments_store.snapshot().fingerprint}:{score_store.size()}"
+    if previous and previous["results"] == results and previous["sentiment"] == sentiment:
+        return None
+
+    # Versions and positions only: the browser re-runs the callbacks, which
+    # patch in the new rows themselves, so events stay a few hundred bytes
+    start = 0
+    if previous and previous["fingerprint"] == snapshot.fingerprint and previous["rows"] <= rows:
+        start = previous["rows"]
+    return {
+        "results": results,
+        "sentiment": sentiment,
+        "fingerprint": snapshot.fingerprint,
+        "rows": rows,
+        "start": start,
+    }
+
+
+# One broadcaster per worker; browsers subscribe to /live/stream. Streams
+# are capped well below the Procfile's 64 threads per worker
+LIVE_MAX_SUBSCRIBERS = int(os.environ.get("LIVE_MAX_SUBSCRIBERS", 48))
+live_channel = LiveChannel(live_event, max_subscribers=LIVE_MAX_SUBSCRIBERS).register(server)
+
+# Callback timings and cache counters at /metrics (PROFILE_HZ adds a profiler)
+instrumentation.install(server)
+instrumentation.collect("results_store", results_store.metrics)
+instrumentation.collect("sentiment", sentiment_engine.metrics)
+instrumentation.collect("figure_cache", figure_cache.metrics)
+instrumentation.collect("server_store", server_store.metrics)
+instrumentation.collect("ticks", ticks.metrics)
+instrumentation.collect("live_channel", live_channel.metrics)
+instrumentation.collect("boundaries", boundary_metrics)
 
 
 def analyze_sentiment(text):
-    analyzer = SentimentIntensityAnalyzer()
+    analyzer = get_analyzer()
     sentiment = analyzer.polarity_scores(text)
     return sentiment
 
 @app.callback(
     Output("sentiment-analysis", "children"),
     Input("candidate-dropdown", "value"),
-    Input("interval-component", "n_intervals"),
+    Input("sentiment-version", "data"),
 )
-
-def update_sentiment_analysis(selected_candidates, n_intervals):
+@timed
+def update_sentiment_analysis(selected_candidates, sentiment_version):
     # Get the data from your dataset
     # For example, assuming you have a dataset with a "Comments" column:
-    comments_data = pd.read_excel("comments_data.xlsx")
+    with stage("scores"):
+        comments_snapshot = comments_store.snapshot()
+
+        scored = score_store.read_new()
+        if len(scored):
+            sentiment_engine.add_scores(scored["hash"], scored["score"])
+
+        # Only comments not seen before are scored; averages are kept as running sums
+        sentiment_engine.refresh(comments_snapshot)
+    comments_data = comments_snapshot.data
 
     # Filter data based on selected candidates
     if selected_candidates and len(selected_candidates) > 0:
         comments_data = comments_data[comments_data["Candidate"].isin(selected_candidates)]
 
-    # Analyze the sentiment of the comments
-    comments_data["Sentiment"] = comments_data["Comments"].apply(analyze_sentiment)
-
-    # Convert sentiment from dictionary to float
-    comments_data["Sentiment"] = comments_data["Sentiment"].apply(lambda x: x["compound"])
-
-    # Calculate average sentiment score for each candidate
-    avg_sentiment = comments_data.groupby("Candidate")["Sentiment"].mean().reset_index()
+    # Average sentiment score for each candidate
+    with stage("averages"):
+        avg_sentiment = sentiment_engine.averages(selected_candidates)
 
     # Create a table to display the average sentiment scores
     sentiment_table = dash_table.DataTable(
@@ -271,7 +357,23 @@ app.layout = dbc.Container(
         dbc.Row(
             [
                 dbc.Col(
-                    html.Div(id="results-table"),
+                    # Pages are cut server-side from the table held in server_store
+                    dash_table.DataTable(
+                        id="results-table",
+                        columns=[{"name": c, "id": c} for c in ["Department"] + sorted(CANDIDATES)],
+                        page_action="custom",
+                        page_current=0,
+                        page_size=RESULTS_TABLE_PAGE_SIZE,
+                        sort_action="custom",
+                        sort_mode="single",
+                        sort_by=[],
+                        style_table={'overflowX': 'auto'},
+                        style_header={'fontWeight': 'bold'},
+                        style_cell={'textAlign': 'left', 'backgroundColor': 'white', 'color': 'black'},
+                        style_data_conditional=[
+                            {'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(242, 242, 242)'},
+                        ],
+                    ),
                     lg=12,
                 ),
             ],
@@ -335,14 +437,29 @@ app.layout = dbc.Container(
             className="my-4",
         ),
 
+        # A browser-side tick: it only checks what /live/stream last pushed
+        # and doesn't reach the server unless the stream is unavailable
         dcc.Interval(
         id="interval-component",
-        interval=10 * 1000,  # in milliseconds
+        interval=1 * 1000,  # in milliseconds
         n_intervals=5,
         #max_intervals=12,  # Add this line
         ),
 
-        dcc.Store(id="filtered-data-store"), 
+        # Data versions from the live channel; the server callbacks run when they change
+        dcc.Store(id="results-version"),
+        dcc.Store(id="sentiment-version"),
+
+        # Key of the current results table in server_store
+        dcc.Store(id="filtered-data-store"),
+
+        # The boundaries reach the browser once, with the layout; map
+        # updates carry only the figure and are joined to them client-side
+        dcc.Store(id="geojson-store", data=senegal_geojson),
+        dcc.Store(id="map-figure-store"),
+
+        # What the browser is currently showing, so ticks can send only the change
+        dcc.Store(id="dashboard-state"),
     ],
     fluid=True,
 )
@@ -352,31 +469,39 @@ app.layout = dbc.Container(
         Output("candidate-info", "children"),
         Output("election-results-graph", "figure"),
         Output("sunburst-chart", "figure"),
-        Output("election-results-map", "figure"),
+        Output("map-figure-store", "data"),
         Output("scatterplot-graph", "figure"),
         Output("pie-chart", "figure"),  # Add this line
         Output("line-chart", "figure"),  # Add this line
-
+        Output("dashboard-state", "data"),
     ],
     [
         Input("region-dropdown", "value"),
         Input("candidate-dropdown", "value"),
         Input("map-mode-toggle", "value"),
-        Input("interval-component", "n_intervals"),
+        Input("results-version", "data"),
     ],
+    State("dashboard-state", "data"),
 )
-
-def update_dashboard(selected_departments, selected_candidates, map_mode, n_intervals):
-    api_data = get_live_data()
-    data = process_data(api_data)
-
-    filtered_data = data.copy()
-    if selected_departments and len(selected_departments) > 0:
-        filtered_data = filtered_data[filtered_data["Department"].isin(selected_departments)]
-    if selected_candidates and len(selected_candidates) > 0:
-        filtered_data = filtered_data[filtered_data["Candidate"].isin(selected_candidates)]
-
-    # The rest of the function remains the same
+@timed
+def update_dashboard(selected_departments, selected_candidates, map_mode, results_version, rendered):
+    with stage("tick"):
+        tick = ticks.at(results_version)
+    snapshot, rows = tick.snapshot, tick.rows
+    selection = make_key(None, selected_departments, selected_candidates, map_mode, fast_figures.USE_PX)
+    state = {"fingerprint": snapshot.fingerprint, "rows": rows, "selection": selection}
+
+    # Nothing changed since the browser last rendered
+    if rendered and all(rendered.get(name) == value for name, value in state.items()):
+        return (no_update,) * 8
+
+    # Figures only change with the data version and the selections
+    key = make_key(f"{tick.version}:{boundary_version}", selected_departments, selected_candidates, map_mode, fast_figures.USE_PX)
+    with stage("figures"):
+        dashboard = figure_cache.get_or_build(
+            key, lambda: build_dashboard(tick, selected_departments, selected_candidates)
+        )
+    state["shown"] = len(dashboard["figures"][0]["data"]) > 0
 
     candidate_info = [
         dbc.Card(
@@ -386,7 +511,7 @@ def update_dashboard(selected_departments, selected_candidates, map_mode, n_inte
                     [
                         html.H4(candidate, className="card-title"),
                         html.P(
-                            f"Percentage: {filtered_data.loc[filtered_data['Candidate'] == candidate, 'Percentage'].mean():.2f}%",
+                            f"Percentage: {float('nan') if percentage is None else percentage:.2f}%",
                             className="card-text",
                         ),
                     ]
@@ -394,8 +519,53 @@ def update_dashboard(selected_departments, selected_candidates, map_mode, n_inte
             ],
             style={"width": "15rem", "display": "inline-block", "margin-right": "10px"},
         )
-        for candidate in (data["Candidate"].unique() if not selected_candidates else selected_candidates)
+        for candidate, percentage in dashboard["percentages"]
+    ]
+
+    # Same file and selection, and the new rows only added departments
+    # to the rollup: extend the browser's traces
+    if (
+        rendered
+        and not fast_figures.USE_PX
+        and rendered.get("shown")
+        and rendered.get("fingerprint") == state["fingerprint"]
+        and rendered.get("selection") == selection
+        and rendered.get("rows", 0) < rows
+    ):
+        with stage("patches"):
+            shown = ticks.at(f"{snapshot.fingerprint}:{rendered['rows']}").departments
+            if not tick.departments.iloc[:len(shown)].equals(shown):
+                return (candidate_info, *dashboard["figures"], state)
+            new_rows = WideResults.from_frame(tick.departments.iloc[len(shown):])
+            patches = fast_figures.dashboard_patches(
+                new_rows, selected_departments, selected_candidates, dashboard, boundary_index
+            )
+        if patches is None:
+            return (no_update,) * 7 + (state,)
+        return (candidate_info, *patches, state)
+
+    return (candidate_info, *dashboard["figures"], state)
+
+
+def build_dashboard(tick, selected_departments, selected_candidates):
+    # Figure dicts straight from the arrays unless FAST_FIGURES=0 asks for px
+    if not fast_figures.USE_PX:
+        return fast_figures.dashboard_figures(
+            tick.results, selected_departments, selected_candidates, candidate_colors, geojson=None, boundaries=boundary_index
+        )
+    return build_dashboard_px(tick, selected_departments, selected_candidates)
+
 
+def build_dashboard_px(tick, selected_departments, selected_candidates):
+    data = tick.tidy
+
+    # Bitmaps per department and candidate, built once per tick
+    filtered_data = data[frame_mask(data, Department=selected_departments, Candidate=selected_candidates)]
+
+    # Mean percentage per candidate for the candidate cards
+    percentages = [
+        (candidate, filtered_data.loc[filtered_data['Candidate'] == candidate, 'Percentage'].mean())
+        for candidate in (data["Candidate"].unique() if not selected_candidates else selected_candidates)
     ]
 
 
@@ -423,11 +593,13 @@ def update_dashboard(selected_departments, selected_candidates, map_mode, n_inte
     )
     
     # Replace the map_fig definition in the update_dashboard function with the following code:
+    # Departments are located by the id of their feature, under any spelling
+    map_data = filtered_data.assign(Feature=feature_ids(filtered_data["Department"].to_numpy(), boundary_index))
     map_fig = px.choropleth_mapbox(
-        filtered_data,
+        map_data,
         geojson=senegal_geojson,
-        locations="Department",
-        featureidkey="properties.NAME_1",
+        locations="Feature",
+        featureidkey="id",
         color="Percentage",
         color_continuous_scale="Viridis",
         mapbox_style="carto-positron",
@@ -449,6 +621,8 @@ def update_dashboard(selected_departments, selected_candidates, map_mode, n_inte
         margin={"r": 0, "t": 0, "l": 0, "b": 0},
         title="Election Results by Department on Map"
     )
+    # The browser already has the boundaries from geojson-store
+    map_fig.update_traces(geojson=None)
 
     scatter_fig = px.scatter(
         filtered_data,
@@ -482,52 +656,106 @@ def update_dashboard(selected_departments, selected_candidates, map_mode, n_inte
     )
 
 
-    return candidate_info, bar_fig, sunburst_fig, map_fig, scatter_fig, pie_fig, line_fig
+    return {
+        "percentages": percentages,
+        "figures": [bar_fig, sunburst_fig, map_fig, scatter_fig, pie_fig, line_fig],
+    }
 
 
-@app.callback(
-    Output("results-table", "children"),
-    [Input("interval-component", "n_intervals")],
+# Attach the boundaries held by the browser to each new map figure
+app.clientside_callback(
+    """
+    function(figure, geojson) {
+        if (!figure) {
+            return window.dash_clientside.no_update;
+        }
+        return Object.assign({}, figure, {
+            data: figure.data.map(function(trace) {
+                return trace.type === "choroplethmapbox" ? Object.assign({}, trace, {geojson: geojson}) : trace;
+            }),
+        });
+    }
+    """,
+    Output("election-results-map", "figure"),
+    Input("map-figure-store", "data"),
+    State("geojson-store", "data"),
+)
+
+
+# Turn pushed events into version changes (assets/live_channel.js)
+app.clientside_callback(
+    ClientsideFunction(namespace="live", function_name="versions"),
+    Output("results-version", "data"),
+    Output("sentiment-version", "data"),
+    Input("interval-component", "n_intervals"),
+    State("results-version", "data"),
+    State("sentiment-version", "data"),
 )
 
 
-def update_results_table(n_intervals):
-    api_data = get_live_data()
-    data = process_data(api_data)
-    total_votes_data = data.copy()
-    total_votes_data["Votes"] = (total_votes_data["Percentage"] * total_votes_data["Votes"]) / 100
-    table_data = total_votes_data.pivot_table(
-        index="Department",
-        columns="Candidate",
-        values="Votes",
-        aggfunc="sum",
-    ).reset_index()
+def results_table_key(version):
+    return f"results-table:{version}"
 
-    # Round the values in the table_data DataFrame
-    table_data.iloc[:, 1:] = table_data.iloc[:, 1:].round()
 
-    table = dbc.Table.from_dataframe(
-        table_data,
-        striped=True,
-        bordered=True,
-        hover=True,
-        responsive=True,
-        className="table-striped",
-        style={"backgroundColor": "white", "color": "black"},
-    )
+@app.callback(
+    Output("filtered-data-store", "data"),
+    [Input("results-version", "data")],
+)
+@timed
+def update_results_table(results_version):
+    # Votes per department and candidate, rounded; built once per tick
+    with stage("tick"):
+        tick = ticks.at(results_version)
+    key = results_table_key(tick.version)
+    # Written once per version, not once per viewer
+    with stage("store"):
+        server_store.ensure(key, lambda: tick.table)
+    return key
 
-    return table
+
+@app.callback(
+    Output("results-table", "data"),
+    Output("results-table", "page_count"),
+    Input("filtered-data-store", "data"),
+    Input("results-table", "page_current"),
+    Input("results-table", "page_size"),
+    Input("results-table", "sort_by"),
+)
+@timed
+def render_results_page(key, page_current, page_size, sort_by):
+    if not key:
+        return [], 0
+
+    # Expired, or written by a worker whose memory we don't share: rebuild it
+    version = key.partition(":")[2]
+    with stage("store"):
+        table_data = server_store.get_or_build(key, lambda: ticks.at(version).table)
+
+    if sort_by:
+        with stage("sort"):
+            table_data = table_data.sort_values(
+                sort_by[0]["column_id"], ascending=sort_by[0]["direction"] == "asc", kind="stable"
+            )
+
+    page_size = page_size or RESULTS_TABLE_PAGE_SIZE
+    start = (page_current or 0) * page_size
+    page_count = max(1, -(-len(table_data) // page_size))
+    with stage("page"):
+        page = table_data.iloc[start:start + page_size].to_dict("records")
+    return page, page_count
 
 @app.callback(
     Output("clicked-department-info", "children"),
     Input("election-results-map", "clickData"),
 )
+@timed
 def display_clicked_department_info(clickData):
     if clickData is None:
         return "Click on a department to see detailed results"
 
     department = clickData["points"][0]["location"]
-    results = data[data["Department"] == department]
+    data = ticks.current().tidy
+    results = data[frame_mask(data, Department=[department])]
 
     # Display the results for the clicked department
     return dbc.Table.from_dataframe(
@@ -0,0 +1,333 @@
+"""Dashboard figures built as plain dicts from the results arrays.
+
+``px.bar``, ``px.sunburst``, ``px.choropleth_mapbox`` and friends validate
+every property and round-trip through graph objects on each call. The
+dashboard's chart set is fixed, so this module writes the same traces
+directly from a ``WideResults`` and reuses a template and layouts built
+once at import. Set ``FAST_FIGURES=0`` to go back to the ``px`` path, and
+use ``parity_check`` to compare the two.
+
+Rows only ever get appended to a replay view, so ``dashboard_patches``
+can turn the rows added since the client's last render into ``Patch``
+updates that extend the existing traces instead of re-sending them.
+
+orjson (in requirements.txt) is used for the figure cache and for Dash's
+own response encoding. Without it both fall back to PlotlyJSONEncoder.
+"""
+import os
+
+import numpy as np
+import plotly.io as pio
+from dash import Patch
+
+from dimensions import candidate_codes, department_codes
+from geometry import feature_ids
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+USE_PX = os.environ.get("FAST_FIGURES", "1") == "0"
+
+if orjson is not None:
+    pio.json.config.default_engine = "orjson"
+
+TEMPLATE = pio.templates[pio.templates.default].to_plotly_json()
+
+MAP_CENTER = {"lat": 14.6928, "lon": -17.4467}
+
+VIRIDIS = [
+    [0.0, "#440154"], [0.1111111111111111, "#482878"], [0.2222222222222222, "#3e4989"],
+    [0.3333333333333333, "#31688e"], [0.4444444444444444, "#26828e"], [0.5555555555555556, "#1f9e89"],
+    [0.6666666666666666, "#35b779"], [0.7777777777777778, "#6ece58"], [0.8888888888888888, "#b5de2b"],
+    [1.0, "#fde725"],
+]
+
+XY_AXES = {"xaxis": {"anchor": "y", "domain": [0.0, 1.0]}, "yaxis": {"anchor": "x", "domain": [0.0, 1.0]}}
+
+# Scatter marker sizes are scaled the way px does with its default size_max
+SIZE_MAX = 20
+
+
+def _layout(title, **extra):
+    layout = {"template": TEMPLATE, "legend": {"tracegroupgap": 0}, "title": {"text": title}}
+    layout.update(extra)
+    return layout
+
+
+def _axes(x_title, y_title):
+    return {
+        "xaxis": dict(XY_AXES["xaxis"], title={"text": x_title}),
+        "yaxis": dict(XY_AXES["yaxis"], title={"text": y_title}),
+    }
+
+
+def select(wide, selected_departments=None, selected_candidates=None):
+    """Rows and candidate columns matching the dropdowns, in data order.
+
+    Matching is on dimension codes, so any spelling of a name selects it.
+    """
+    rows = np.ones(len(wide), dtype=bool)
+    if selected_departments:
+        rows = wide.department_index.mask(department_codes.codes(selected_departments))
+    columns = list(range(len(wide.candidates)))
+    if selected_candidates:
+        wanted = set(candidate_codes.codes(selected_candidates).tolist())
+        columns = [j for j in columns if wide.candidate_codes[j] in wanted]
+    return rows, columns
+
+
+def card_percentages(wide, rows, columns, selected_candidates=None):
+    """Mean percentage per candidate card, matching the tidy-frame ``mean()``."""
+    if selected_candidates:
+        candidates = list(selected_candidates)
+    else:
+        candidates = list(wide.candidates) if len(wide) else []
+    means = {}
+    for j in columns:
+        values = wide.percentages[rows, j]
+        values = values[~np.isnan(values)]
+        means[wide.candidate_codes[j]] = float(values.mean()) if len(values) else float("nan")
+    return [(candidate, means.get(candidate_codes.code(candidate), float("nan"))) for candidate in candidates]
+
+
+def bar_figure(departments, percentages, candidates, colors):
+    traces = [
+        {
+            "type": "bar", "name": candidate, "legendgroup": candidate, "offsetgroup": candidate,
+            "alignmentgroup": "True", "orientation": "v", "showlegend": True,
+            "marker": {"color": colors.get(candidate), "pattern": {"shape": ""}},
+            "x": departments, "y": percentages[:, j], "text": percentages[:, j],
+            "texttemplate": "%{text:.2f}%", "textposition": "outside",
+            "hovertemplate": f"Candidate={candidate}<br>Department=%{{x}}<br>Percentage=%{{text}}<extra></extra>",
+            "xaxis": "x", "yaxis": "y",
+        }
+        for j, candidate in enumerate(candidates)
+    ]
+    layout = _layout(
+        "Election Results by Department", barmode="group", uniformtext={"minsize": 8, "mode": "hide"},
+        **_axes("Department", "Percentage"),
+    )
+    layout["legend"]["title"] = {"text": "Candidate"}
+    return {"data": traces, "layout": layout}
+
+
+def sunburst_figure(departments, percentages, candidates, colors):
+    # Leaves are summed per (candidate, department), parents per candidate
+    names, inverse = np.unique(departments, return_inverse=True)
+    ids, labels, parents, values, node_colors, customdata = [], [], [], [], [], []
+    for j, candidate in enumerate(candidates):
+        column = np.nan_to_num(percentages[:, j])
+        sums = np.bincount(inverse, weights=column, minlength=len(names))
+        present = np.bincount(inverse, minlength=len(names)) > 0
+        for name, total in zip(names[present], sums[present]):
+            ids.append(f"{candidate}/{name}")
+            labels.append(name)
+            parents.append(candidate)
+            values.append(total)
+            node_colors.append(colors.get(candidate))
+            customdata.append([candidate])
+        ids.append(candidate)
+        labels.append(candidate)
+        parents.append("")
+        values.append(column.sum())
+        node_colors.append(colors.get(candidate))
+        customdata.append([candidate])
+
+    trace = {
+        "type": "sunburst", "branchvalues": "total", "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+        "ids": ids, "labels": labels, "parents": parents, "values": values,
+        "marker": {"colors": node_colors}, "customdata": customdata,
+        "hovertemplate": "labels=%{label}<br>Percentage=%{value}<br>parent=%{parent}<br>id=%{id}<br>Candidate=%{customdata[0]}<extra></extra>",
+        "name": "",
+    }
+    return {"data": [trace], "layout": _layout("Election Results by Candidate and Department")}
+
+
+def _map_arrays(departments, percentages, candidates):
+    # Row by row (unlike px, which goes candidate by candidate) so new rows
+    # only ever extend the end of the arrays
+    k = len(candidates)
+    locations = np.repeat(departments, k)
+    z = percentages.ravel()
+    candidate_column = np.tile(np.array(candidates, dtype=object), len(departments))
+    return locations, z, candidate_column
+
+
+def _map_locations(names, boundaries):
+    # Feature ids from the boundary index; without one, names matched to NAME_1
+    return feature_ids(names, boundaries) if boundaries is not None else names
+
+
+def map_figure(departments, percentages, candidates, geojson=None, boundaries=None):
+    """``boundaries`` is ``geometry.feature_index`` of the geojson the map is drawn on."""
+    names, z, candidate_column = _map_arrays(departments, percentages, candidates)
+    trace = {
+        "type": "choroplethmapbox", "coloraxis": "coloraxis",
+        "featureidkey": "id" if boundaries is not None else "properties.NAME_1",
+        "locations": _map_locations(names, boundaries), "z": z, "name": "",
+        "customdata": np.column_stack([names, candidate_column, z]) if len(z) else [],
+        "hovertemplate": "Department=%{customdata[0]}<br>Candidate=%{customdata[1]}<br>Percentage=%{customdata[2]}<extra></extra>",
+        "marker": {"opacity": 0.5}, "subplot": "mapbox",
+    }
+    if geojson is not None:
+        trace["geojson"] = geojson
+    layout = _layout(
+        "Election Results by Department on Map",
+        mapbox={"domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]}, "center": MAP_CENTER, "zoom": 5, "style": "carto-positron"},
+        coloraxis={"colorbar": {"title": {"text": "Percentage"}}, "colorscale": VIRIDIS},
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+    )
+    return {"data": [trace], "layout": layout}
+
+
+def scatter_figure(departments, votes, percentages, candidates, colors):
+    finite = percentages[np.isfinite(percentages)]
+    sizeref = 2.0 * finite.max() / SIZE_MAX ** 2 if len(finite) else 1.0
+    traces = [
+        {
+            "type": "scatter", "mode": "markers", "name": candidate, "legendgroup": candidate,
+            "orientation": "v", "showlegend": True, "x": votes, "y": percentages[:, j],
+            "marker": {"color": colors.get(candidate), "size": percentages[:, j], "sizemode": "area", "sizeref": sizeref, "symbol": "circle"},
+            "customdata": np.column_stack([departments, np.full(len(departments), candidate, dtype=object)]),
+            "hovertemplate": "Candidate=%{customdata[1]}<br>Total Votes=%{x}<br>Percentage=%{marker.size}<br>Department=%{customdata[0]}<extra></extra>",
+            "xaxis": "x", "yaxis": "y",
+        }
+        for j, candidate in enumerate(candidates)
+    ]
+    layout = _layout("Election Results Scatterplot", **_axes("Total Votes", "Percentage"))
+    layout["legend"].update(title={"text": "Candidate"}, itemsizing="constant")
+    return {"data": traces, "layout": layout}
+
+
+def pie_figure(percentages, candidates):
+    # Plotly sums slices with the same label, so send one value per candidate
+    trace = {
+        "type": "pie", "labels": list(candidates), "values": np.nansum(percentages, axis=0),
+        "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]}, "legendgroup": "", "name": "", "showlegend": True,
+        "hovertemplate": "Candidate=%{label}<br>Percentage=%{value}<extra></extra>",
+    }
+    return {"data": [trace], "layout": _layout("Election Results by Candidate")}
+
+
+def line_figure(departments, percentages, candidates, colors):
+    traces = [
+        {
+            "type": "scatter", "mode": "lines", "name": candidate, "legendgroup": candidate,
+            "orientation": "v", "showlegend": True, "x": departments, "y": percentages[:, j],
+            "line": {"color": colors.get(candidate), "dash": "solid", "shape": "spline"},
+            "marker": {"symbol": "circle"},
+            "hovertemplate": f"Candidate={candidate}<br>Department=%{{x}}<br>Percentage=%{{y}}<extra></extra>",
+            "xaxis": "x", "yaxis": "y",
+        }
+        for j, candidate in enumerate(candidates)
+    ]
+    layout = _layout("Election Results Trend", **_axes("Department", "Percentage"))
+    layout["legend"]["title"] = {"text": "Candidate"}
+    return {"data": traces, "layout": layout}
+
+
+def dashboard_figures(wide, selected_departments, selected_candidates, colors, geojson=None, boundaries=None):
+    """Card percentages and the bar, sunburst, map, scatter, pie and line figures."""
+    rows, columns = select(wide, selected_departments, selected_candidates)
+    departments = wide.departments[rows]
+    votes = wide.votes[rows]
+    percentages = wide.percentages[rows][:, columns]
+    candidates = [wide.candidates[j] for j in columns]
+
+    # px drops traces for candidates with no rows at all
+    if not len(departments):
+        candidates, percentages = [], percentages[:, :0]
+
+    return {
+        "percentages": card_percentages(wide, rows, columns, selected_candidates),
+        "figures": [
+            bar_figure(departments, percentages, candidates, colors),
+            sunburst_figure(departments, percentages, candidates, colors),
+            map_figure(departments, percentages, candidates, geojson, boundaries),
+            scatter_figure(departments, votes, percentages, candidates, colors),
+            pie_figure(percentages, candidates),
+            line_figure(departments, percentages, candidates, colors),
+        ],
+    }
+
+
+def dashboard_patches(new_rows, selected_departments, selected_candidates, dashboard, boundaries=None):
+    """Patches taking the client's figures to ``dashboard`` when ``new_rows`` were appended.
+
+    ``new_rows`` is a ``WideResults`` of only the appended rows; ``dashboard``
+    is the full result for the new version, used for the parts that are
+    cheap to resend whole (sunburst trace, pie values, scatter sizeref).
+    Returns ``None`` when nothing visible changed.
+    """
+    rows, columns = select(new_rows, selected_departments, selected_candidates)
+    if not rows.any():
+        return None
+    departments = new_rows.departments[rows].tolist()
+    votes = new_rows.votes[rows].tolist()
+    percentages = new_rows.percentages[rows][:, columns]
+    candidates = [new_rows.candidates[j] for j in columns]
+    figures = dashboard["figures"]
+
+    bar, sunburst, map_, scatter, pie, line = (Patch() for _ in range(6))
+    for t, candidate in enumerate(candidates):
+        values = percentages[:, t].tolist()
+        bar["data"][t]["x"].extend(departments)
+        bar["data"][t]["y"].extend(values)
+        bar["data"][t]["text"].extend(values)
+        line["data"][t]["x"].extend(departments)
+        line["data"][t]["y"].extend(values)
+        scatter["data"][t]["x"].extend(votes)
+        scatter["data"][t]["y"].extend(values)
+        scatter["data"][t]["marker"]["size"].extend(values)
+        scatter["data"][t]["marker"]["sizeref"] = figures[3]["data"][t]["marker"]["sizeref"]
+        scatter["data"][t]["customdata"].extend([[department, candidate] for department in departments])
+
+    names, z, candidate_column = _map_arrays(np.array(departments, dtype=object), percentages, candidates)
+    map_["data"][0]["locations"].extend(_map_locations(names, boundaries).tolist())
+    map_["data"][0]["z"].extend(z.tolist())
+    map_["data"][0]["customdata"].extend(np.column_stack([names, candidate_column, z]).tolist())
+
+    # Sunburst nodes are aggregates, so its one trace goes whole (without the layout)
+    sunburst["data"][0] = figures[1]["data"][0]
+    pie["data"][0]["values"] = figures[4]["data"][0]["values"]
+    return [bar, sunburst, map_, scatter, pie, line]
+
+
+def _trace_arrays(figure):
+    keys = ("x", "y", "z", "values", "locations", "labels", "ids", "parents")
+    traces = figure["data"] if isinstance(figure, dict) else figure.to_plotly_json()["data"]
+    return [
+        {key: np.asarray(trace[key]).tolist() for key in keys if trace.get(key) is not None}
+        for trace in traces
+    ]
+
+
+def parity_check(fast, reference):
+    """Names of the figures whose trace data differs between the two paths."""
+    names = ["bar", "sunburst", "map", "scatter", "pie", "line"]
+    mismatched = []
+    for name, a, b in zip(names, fast["figures"], reference["figures"]):
+        if name == "map":
+            # Same (location, value) pairs, in a different order than px
+            def pairs(figure):
+                trace = _trace_arrays(figure)[0] if _trace_arrays(figure) else {}
+                return sorted(zip(trace.get("locations", []), trace.get("z", [])))
+            same = pairs(a) == pairs(b)
+        elif name in ("sunburst", "pie"):
+            # Node order and slice aggregation differ; compare totals per label
+            def totals(figure):
+                trace = _trace_arrays(figure)[0]
+                key = "ids" if "ids" in trace else "labels"
+                result = {}
+                for label, value in zip(trace[key], trace["values"]):
+                    result[label] = result.get(label, 0) + value
+                return {label: round(value, 6) for label, value in result.items()}
+            same = totals(a) == totals(b)
+        else:
+            same = _trace_arrays(a) == _trace_arrays(b)
+        if not same:
+            mismatched.append(name)
+    return mismatched
@@ -0,0 +1,184 @@
+"""LRU cache for rendered dashboard figures.
+
+Entries are keyed on the data version plus the normalized dropdown
+selections and stored as JSON. Each worker keeps a small in-memory LRU
+capped at ``max_bytes``; behind it is a directory shared by every worker on
+the host, capped at ``disk_max_bytes`` and evicted by least recent use
+(file mtime is bumped on every hit). A figure rendered by one worker is
+therefore a disk read for the others. The directory is private to this
+user and checkout (``private_dir``).
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from plotly.utils import PlotlyJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from private_dir import app_path, private_directory
+
+
+DEFAULT_DIRECTORY = os.environ.get("FIGURE_CACHE_DIR") or app_path("figure_cache")
+DEFAULT_MAX_BYTES = int(float(os.environ.get("FIGURE_CACHE_MB", 64)) * 2**20)
+DEFAULT_DISK_MAX_BYTES = int(float(os.environ.get("FIGURE_CACHE_DISK_MB", 256)) * 2**20)
+
+
+def _default(value):
+    if hasattr(value, "to_plotly_json"):
+        return value.to_plotly_json()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """JSON bytes for figures and plain data; orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, cls=PlotlyJSONEncoder).encode("utf-8")
+
+
+def loads(payload):
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+def normalize_selection(values):
+    """Order-insensitive form of a dropdown value; empty and None are the same."""
+    if values is None:
+        return ()
+    if isinstance(values, (list, tuple, set)):
+        return tuple(sorted(set(values)))
+    return values
+
+
+def make_key(version, *selections):
+    return json.dumps([version] + [normalize_selection(s) for s in selections], default=str)
+
+
+class FigureCache:
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, disk_max_bytes=DEFAULT_DISK_MAX_BYTES, sweep_every=32):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.sweep_every = sweep_every
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._puts = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            # Figures are served as read, so nobody else may write them
+            private_directory(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _remember(self, key, payload):
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            if len(payload) > self.max_bytes:
+                return
+            self._memory[key] = payload
+            self._memory_bytes += len(payload)
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return payload
+
+    def _write_disk(self, key, payload):
+        if not self.directory:
+            return
+        tmp = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        self._puts += 1
+        if self._puts % self.sweep_every == 0:
+            self.sweep()
+
+    def sweep(self):
+        """Trim the shared directory to ``disk_max_bytes``, least recently used first."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get(self, key):
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return loads(payload)
+
+        payload = self._read_disk(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, payload)
+        return loads(payload)
+
+    def put(self, key, value):
+        """Store a JSON-able value (plotly figures included); returns it as plain JSON data."""
+        payload = dumps(value)
+        self._remember(key, payload)
+        self._write_disk(key, payload)
+        return loads(payload)
+
+    def get_or_build(self, key, build):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, build())
+        return value
+
+    def metrics(self):
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
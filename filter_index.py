@@ -0,0 +1,103 @@
+"""Precomputed bitmaps for the department and candidate dropdown filters.
+
+``isin`` over the melted frame rebuilds a mask from the strings on every
+callback. A ``BitmapIndex`` keeps one packed bitmap per dimension code
+instead, so a multi-select filter is an OR over a few bitmaps and the
+department/candidate combination an AND, both on bytes eight rows at a
+time. Indexes are built once per frame and cached for as long as the
+frame is alive, which for the dashboards means once per snapshot.
+"""
+import threading
+import weakref
+
+import numpy as np
+
+from dimensions import candidate_codes, department_codes
+
+
+# Frame columns and the dimension that codes them
+DIMENSIONS = {"Department": department_codes, "Candidate": candidate_codes}
+
+
+class BitmapIndex:
+    """One packed bitmap over the rows for each code; -1 rows are in none."""
+
+    def __init__(self, codes):
+        codes = np.asarray(codes)
+        self.rows = len(codes)
+        self.size = int(codes.max()) + 1 if len(codes) and codes.max() >= 0 else 0
+        present = np.flatnonzero(codes >= 0)
+        bits = np.zeros((self.size, self.rows), dtype=bool)
+        bits[codes[present], present] = True
+        self.bitmaps = np.packbits(bits, axis=1)
+
+    def packed(self, codes):
+        """OR of the bitmaps of ``codes``, still packed."""
+        codes = np.asarray(codes, dtype=np.int64)
+        codes = codes[(codes >= 0) & (codes < self.size)]
+        if not len(codes):
+            return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[codes], axis=0)
+
+    def mask(self, codes):
+        return unpack(self.packed(codes), self.rows)
+
+
+def unpack(packed, rows):
+    return np.unpackbits(packed, count=rows).view(bool)
+
+
+class FilterIndex:
+    """Bitmap indexes over several coded columns of the same rows."""
+
+    def __init__(self, rows, dimensions=DIMENSIONS, **codes):
+        self.rows = rows
+        self.dimensions = dimensions
+        self.indexes = {name: BitmapIndex(values) for name, values in codes.items()}
+
+    @classmethod
+    def from_frame(cls, frame, dimensions=DIMENSIONS):
+        codes = {
+            column: dimension.encode(frame[column].to_numpy(), add=True)
+            for column, dimension in dimensions.items()
+            if column in frame.columns
+        }
+        return cls(len(frame), dimensions, **codes)
+
+    def mask(self, **selections):
+        """Rows matching every non-empty selection; a selection is a list of labels."""
+        packed = None
+        for name, labels in selections.items():
+            if not labels or name not in self.indexes:
+                continue
+            selected = self.indexes[name].packed(self.dimensions[name].codes(labels))
+            packed = selected if packed is None else packed & selected
+        if packed is None:
+            return np.ones(self.rows, dtype=bool)
+        return unpack(packed, self.rows)
+
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def index_for(frame):
+    """The ``FilterIndex`` of ``frame``, built on first use while it is alive.
+
+    Frames are keyed by identity, so this relies on them being replaced,
+    not modified in place, when the data changes.
+    """
+    key = id(frame)
+    with _lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0]() is frame:
+            return entry[1]
+    index = FilterIndex.from_frame(frame)
+    with _lock:
+        _indexes[key] = (weakref.ref(frame, lambda _, key=key: _indexes.pop(key, None)), index)
+    return index
+
+
+def frame_mask(frame, **selections):
+    """Boolean row mask of ``frame`` for the dropdown selections."""
+    return index_for(frame).mask(**selections)
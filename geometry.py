@@ -0,0 +1,242 @@
+"""Senegal boundary preprocessing and loading.
+
+The dashboards used to ``json.load`` a ``senegal.geojson`` that isn't in the
+repository and embed the full geometry in every choropleth they returned.
+This module simplifies polygons (Douglas-Peucker) with a tolerance per map
+zoom level, quantizes coordinates to a fixed number of decimals, and
+indexes features by department name. Every feature gets an ``id``, and
+the maps locate departments by the id of their feature (``feature_ids``),
+so any spelling of a department name finds its boundary.
+
+senegal2.geojson holds only the national outline; no department matches
+it, and the map draws nothing until a file with department boundaries
+(``NAME_1``, ``NAME_2`` or ``name`` properties) is dropped in as
+senegal.geojson. Simplified variants are build
+artefacts, not committed. They can be written next to the source at
+deploy time:
+
+    python geometry.py senegal2.geojson --zooms 5 7 9 --decimals 4
+
+A zoom level whose variant would be identical to the previous level's is
+skipped. ``load_boundaries`` picks the variants up, and falls back to
+simplifying in memory when they are missing or older than the source.
+"""
+import argparse
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from dimensions import normalize_label
+
+
+SOURCES = ["senegal.geojson", "senegal2.geojson"]
+
+# Simplification tolerance in degrees for each mapbox zoom level
+ZOOM_TOLERANCES = {5: 0.01, 7: 0.003, 9: 0.001}
+DEFAULT_ZOOM = 5
+DEFAULT_DECIMALS = 4
+
+NAME_KEYS = ["NAME_1", "NAME_2", "name"]
+
+
+def simplify_line(points, tolerance):
+    """Douglas-Peucker over an (n, 2) array; the end points are always kept."""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3 or tolerance <= 0:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        between = points[start + 1:end]
+        dx, dy = b - a
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(between[:, 0] - a[0], between[:, 1] - a[1])
+        else:
+            distances = np.abs(dx * (between[:, 1] - a[1]) - dy * (between[:, 0] - a[0])) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def quantize(points, decimals):
+    """Round coordinates and drop the consecutive duplicates that produces."""
+    points = np.round(np.asarray(points, dtype=np.float64), decimals)
+    if len(points) < 2:
+        return points
+    moved = np.any(points[1:] != points[:-1], axis=1)
+    return points[np.concatenate([[True], moved])]
+
+
+def _simplify_polygon(rings, tolerance, decimals):
+    result = []
+    for position, ring in enumerate(rings):
+        simplified = quantize(simplify_line(ring, tolerance), decimals)
+        if len(simplified) < 4:
+            if position > 0:
+                # A hole smaller than the tolerance just disappears
+                continue
+            simplified = quantize(ring, decimals)
+        result.append(simplified.tolist())
+    return result
+
+
+def simplify_geometry(geometry, tolerance, decimals=DEFAULT_DECIMALS):
+    kind = geometry["type"]
+    if kind == "Polygon":
+        coordinates = _simplify_polygon(geometry["coordinates"], tolerance, decimals)
+    elif kind == "MultiPolygon":
+        coordinates = [_simplify_polygon(polygon, tolerance, decimals) for polygon in geometry["coordinates"]]
+    else:
+        return geometry
+    return {"type": kind, "coordinates": coordinates}
+
+
+def as_feature_collection(geojson):
+    if geojson.get("type") == "FeatureCollection":
+        return geojson
+    if geojson.get("type") == "Feature":
+        return {"type": "FeatureCollection", "features": [geojson]}
+    return {"type": "FeatureCollection", "features": [{"type": "Feature", "properties": {}, "geometry": geojson}]}
+
+
+def with_ids(geojson):
+    """``geojson`` as a feature collection whose features all have an ``id``."""
+    collection = as_feature_collection(geojson)
+    if all(feature.get("id") is not None for feature in collection["features"]):
+        return collection
+    features = []
+    for position, feature in enumerate(collection["features"]):
+        for key in ("id", "_id"):
+            if feature.get(key) is not None:
+                features.append(dict(feature, id=feature[key]))
+                break
+        else:
+            features.append(dict(feature, id=str(position)))
+    return dict(collection, features=features)
+
+
+def simplify_geojson(geojson, tolerance, decimals=DEFAULT_DECIMALS):
+    collection = with_ids(geojson)
+    features = []
+    for feature in collection["features"]:
+        properties = dict(feature.get("properties") or {})
+        # Charts look features up by properties.NAME_1
+        for key in NAME_KEYS:
+            if properties.get(key):
+                properties.setdefault("NAME_1", properties[key])
+                break
+        features.append({
+            "type": "Feature",
+            "id": feature["id"],
+            "properties": properties,
+            "geometry": simplify_geometry(feature["geometry"], tolerance, decimals),
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def feature_index(geojson):
+    """Map normalized department names to their features."""
+    index = {}
+    for feature in as_feature_collection(geojson)["features"]:
+        properties = feature.get("properties") or {}
+        for key in NAME_KEYS:
+            if properties.get(key):
+                index.setdefault(normalize_label(properties[key]), feature)
+    return index
+
+
+def feature_ids(names, index):
+    """The ``id`` of each name's feature in ``index``, or None where there is none."""
+    ids = {}
+    for name in names:
+        if name not in ids:
+            feature = index.get(normalize_label(name))
+            ids[name] = feature["id"] if feature is not None else None
+    return np.array([ids[name] for name in names], dtype=object)
+
+
+def missing_features(names, index):
+    """The names (e.g. departments) with no feature in ``index`` under any spelling."""
+    return sorted({name for name in names if normalize_label(name) not in index})
+
+
+def variant_path(path, zoom):
+    root, ext = os.path.splitext(path)
+    return f"{root}.z{zoom}{ext}"
+
+
+def find_source():
+    for path in SOURCES:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"none of {SOURCES} found")
+
+
+def _tolerance(zoom):
+    # The closest configured zoom level at or below the requested one
+    levels = [level for level in sorted(ZOOM_TOLERANCES) if level <= zoom]
+    return ZOOM_TOLERANCES[levels[-1] if levels else min(ZOOM_TOLERANCES)]
+
+
+@lru_cache(maxsize=None)
+def load_boundaries(path=None, zoom=DEFAULT_ZOOM, decimals=DEFAULT_DECIMALS):
+    """Simplified boundaries for ``zoom``, loaded once per process."""
+    path = path or find_source()
+    variant = variant_path(path, zoom)
+    if os.path.exists(variant) and os.path.getmtime(variant) >= os.path.getmtime(path):
+        with open(variant) as f:
+            # Variants written before features had ids get them here
+            return with_ids(json.load(f))
+    with open(path) as f:
+        return simplify_geojson(json.load(f), _tolerance(zoom), decimals)
+
+
+def write_variants(path, zooms=tuple(ZOOM_TOLERANCES), decimals=DEFAULT_DECIMALS):
+    with open(path) as f:
+        source = json.load(f)
+    written = []
+    previous = None
+    for zoom in sorted(zooms):
+        text = json.dumps(simplify_geojson(source, _tolerance(zoom), decimals), separators=(",", ":"))
+        target = variant_path(path, zoom)
+        if text == previous:
+            # Same as the coarser level; simplifying in memory gives the same
+            if os.path.exists(target):
+                os.remove(target)
+            written.append((target, None))
+            continue
+        with open(target, "w") as f:
+            f.write(text)
+        previous = text
+        written.append((target, os.path.getsize(target)))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write simplified per-zoom variants of a GeoJSON file")
+    parser.add_argument("source", nargs="?", default=None)
+    parser.add_argument("--zooms", type=int, nargs="+", default=list(ZOOM_TOLERANCES))
+    parser.add_argument("--decimals", type=int, default=DEFAULT_DECIMALS)
+    args = parser.parse_args()
+
+    source = args.source or find_source()
+    print(f"{source}: {os.path.getsize(source)} bytes")
+    for target, size in write_variants(source, args.zooms, args.decimals):
+        print(f"{target}: {size} bytes" if size is not None else f"{target}: same as the previous zoom, not written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+# Read by gunicorn from the working directory (see the Procfile)
+import os
+import time
+
+
+def on_starting(server):
+    # One replay per master start, shared by every worker it forks
+    # (replay_clock.boot_id); an explicit REPLAY_BOOT wins
+    os.environ.setdefault("REPLAY_BOOT", f"gunicorn:{os.getpid()}:{time.time()}")
@@ -0,0 +1,192 @@
+"""Polling-station results rolled up to department, region and national level.
+
+The feed will report per polling station (bureau): over 14,000 nationally,
+1,190 in Dakar alone. ``ResultsHierarchy`` keeps the latest counts of every
+bureau in a NumPy matrix indexed by integer bureau id, with department,
+region and national totals alongside. Each batch of rows moves the totals
+by the change in the bureaux it touches, so a report costs time
+proportional to the bureaux in it, not to the whole country. Rows without
+a department can't be rolled up; they are left out and counted in
+``rows_without_department``.
+
+Rows without a bureau column are treated as one bureau per department,
+which is how the department-level files we have today fit in. Department
+ids are their ``dimensions`` codes, so every spelling of a department
+lands in the same row.
+"""
+import numpy as np
+import pandas as pd
+
+from dimensions import CANDIDATES, REGIONS, department_codes
+
+
+# Departments that aren't in REGIONS are rolled up under this region
+UNKNOWN_REGION = "Other"
+
+VALUE_COLUMNS = ["Votes"] + CANDIDATES
+LEVELS = ["bureau", "department", "region", "national"]
+
+
+def scatter_add(target, ids, values=None):
+    """``target[ids] += values`` with repeated ids summed (bincount, not ufunc.at)."""
+    if values is None:
+        target += np.bincount(ids, minlength=len(target)).astype(target.dtype)
+        return
+    for j in range(target.shape[1]):
+        target[:, j] += np.bincount(ids, weights=values[:, j], minlength=len(target))
+
+
+class ResultsHierarchy:
+    """Latest counts per bureau and their rollups, as integer-indexed arrays."""
+
+    def __init__(self, value_columns=VALUE_COLUMNS, regions=REGIONS, dimension=department_codes, department="Department", bureau="Bureau"):
+        self.value_columns = list(value_columns)
+        self.dimension = dimension
+        self.department = department
+        self.bureau = bureau
+        k = len(self.value_columns)
+
+        self.regions = list(regions) + [UNKNOWN_REGION]
+        self._region_of = {}
+        for region_id, region in enumerate(regions):
+            for name in regions[region]:
+                self._region_of[dimension.add(name)] = region_id
+        self.department_region = np.zeros(0, dtype=np.int32)
+        self.department_values = np.zeros((0, k))
+        self.department_bureaux = np.zeros(0, dtype=np.int64)
+
+        self.bureaux = []
+        self._bureau_ids = {}
+        self.bureau_department = np.zeros(0, dtype=np.int32)
+        self.bureau_values = np.zeros((0, k))
+
+        self.region_values = np.zeros((len(self.regions), k))
+        self.region_bureaux = np.zeros(len(self.regions), dtype=np.int64)
+        self.national = np.zeros(k)
+        # Departments in the order they first reported
+        self.reporting_order = []
+        self.rows_seen = 0
+        self.rows_without_department = 0
+        self._grow()
+
+    def copy(self):
+        other = object.__new__(ResultsHierarchy)
+        other.__dict__.update(self.__dict__)
+        for name, value in self.__dict__.items():
+            if isinstance(value, (np.ndarray, list, dict)):
+                setattr(other, name, value.copy())
+        return other
+
+    def _grow(self):
+        """Make room for departments the dimension learned since the last call."""
+        known, count = len(self.department_region), len(self.dimension)
+        if count == known:
+            return
+        other = len(self.regions) - 1
+        regions = [self._region_of.get(code, other) for code in range(known, count)]
+        self.department_region = np.concatenate([self.department_region, np.array(regions, dtype=np.int32)])
+        self.department_values = np.vstack([self.department_values, np.zeros((count - known, len(self.value_columns)))])
+        self.department_bureaux = np.concatenate([self.department_bureaux, np.zeros(count - known, dtype=np.int64)])
+
+    def _bureau_ids_for(self, keys, department_ids):
+        ids = np.fromiter((self._bureau_ids.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        new = np.flatnonzero(ids < 0)
+        ids[new] = np.arange(len(self.bureaux), len(self.bureaux) + len(new))
+        for position in new:
+            self._bureau_ids[keys[position]] = int(ids[position])
+            self.bureaux.append(keys[position])
+        new_departments = department_ids[new]
+
+        if len(new):
+            self.bureau_department = np.concatenate([self.bureau_department, new_departments])
+            self.bureau_values = np.vstack([self.bureau_values, np.zeros((len(new_departments), len(self.value_columns)))])
+            _, first = np.unique(new_departments, return_index=True)
+            for department_id in new_departments[np.sort(first)]:
+                if self.department_bureaux[department_id] == 0:
+                    self.reporting_order.append(int(department_id))
+            scatter_add(self.department_bureaux, new_departments)
+            scatter_add(self.region_bureaux, self.department_region[new_departments])
+        return ids
+
+    def apply(self, rows):
+        """Fold new ``rows`` in; a bureau's newer row replaces its older one.
+
+        Returns the ids of the departments whose totals changed.
+        """
+        if rows is None or len(rows) == 0:
+            return np.zeros(0, dtype=np.int32)
+        self.rows_seen += len(rows)
+
+        codes = self.dimension.encode(rows[self.department].to_numpy(), add=True)
+        self._grow()
+        # A missing department encodes as -1, which no rollup can index
+        known = codes >= 0
+        if not known.all():
+            self.rows_without_department += int(len(codes) - known.sum())
+            rows, codes = rows[known], codes[known]
+            if len(rows) == 0:
+                return np.zeros(0, dtype=np.int32)
+        bureaux = rows[self.bureau].to_numpy() if self.bureau in rows.columns else codes
+        keys = list(zip(codes.tolist(), bureaux.tolist()))
+
+        # Only the last row of each bureau in the batch counts
+        last = {key: i for i, key in enumerate(keys)}
+        positions = np.fromiter(last.values(), dtype=np.int64, count=len(last))
+        keys = list(last)
+
+        department_ids = codes[positions]
+        bureau_ids = self._bureau_ids_for(keys, department_ids)
+
+        frame = rows.iloc[positions]
+        values = np.column_stack([
+            pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64) for column in self.value_columns
+        ])
+        values = np.nan_to_num(values)
+
+        delta = values - self.bureau_values[bureau_ids]
+        self.bureau_values[bureau_ids] = values
+        scatter_add(self.department_values, department_ids, delta)
+        scatter_add(self.region_values, self.department_region[department_ids], delta)
+        self.national += delta.sum(axis=0)
+        return np.unique(department_ids)
+
+    def _frame(self, key, names, values, bureaux):
+        # Counts are whole numbers; the float matrix is only for the arithmetic
+        data = pd.DataFrame(np.rint(values).astype(np.int64), columns=self.value_columns)
+        data.insert(0, key, names)
+        data["Bureaux reported"] = bureaux
+        return data
+
+    def department_frame(self):
+        """One row per reporting department, in the order they first reported."""
+        order = np.array(self.reporting_order, dtype=np.int64)
+        names = self.dimension.decode(order)
+        return self._frame(self.department, names, self.department_values[order], self.department_bureaux[order])
+
+    def region_frame(self):
+        """One row per region with at least one bureau reported."""
+        order = np.flatnonzero(self.region_bureaux)
+        names = np.array(self.regions, dtype=object)[order]
+        return self._frame("Region", names, self.region_values[order], self.region_bureaux[order])
+
+    def bureau_frame(self):
+        departments = self.dimension.decode(self.bureau_department)
+        data = pd.DataFrame(np.rint(self.bureau_values).astype(np.int64), columns=self.value_columns)
+        data.insert(0, self.bureau, [bureau for _, bureau in self.bureaux])
+        data.insert(0, self.department, departments)
+        return data
+
+    def national_totals(self):
+        return pd.Series(self.national, index=self.value_columns)
+
+    def level(self, name):
+        """Rollup frame for one of ``LEVELS``."""
+        if name == "bureau":
+            return self.bureau_frame()
+        if name == "department":
+            return self.department_frame()
+        if name == "region":
+            return self.region_frame()
+        if name == "national":
+            return self.national_totals()
+        raise ValueError(f"unknown level {name!r}, expected one of {LEVELS}")
@@ -0,0 +1,157 @@
+"""Append-only ingestion of timestamped results.
+
+``CsvTail`` remembers how far into a csv it has read and only parses the
+bytes appended since; ``DropDirectory`` does the same for a directory
+where each new results drop arrives as its own file. Either feeds a
+``ResultsAggregator``, which keeps the latest row per department and the
+national per-column totals, so a tick costs time proportional to the rows
+that arrived rather than to the whole history.
+"""
+import glob
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class CsvTail:
+    """Parse only the rows appended to a csv since the last call."""
+
+    def __init__(self, path, **read_csv_kwargs):
+        self.path = path
+        self.read_csv_kwargs = read_csv_kwargs
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self._header = None
+        self._partial = b""
+        self._inode = None
+
+    def read_new(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        # A rotated or truncated file is read again from the start
+        if self._inode not in (None, st.st_ino) or st.st_size < self.offset:
+            self._reset()
+        self._inode = st.st_ino
+        if st.st_size == self.offset:
+            return None
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(st.st_size - self.offset)
+        self.offset += len(chunk)
+
+        # Keep a trailing line without its newline for the next call
+        buffer = self._partial + chunk
+        end = buffer.rfind(b"\n") + 1
+        buffer, self._partial = buffer[:end], buffer[end:]
+
+        if self._header is None:
+            newline = buffer.find(b"\n") + 1
+            if newline == 0:
+                self._partial = buffer + self._partial
+                return None
+            self._header, buffer = buffer[:newline], buffer[newline:]
+        if not buffer:
+            return None
+        return pd.read_csv(io.BytesIO(self._header + buffer), **self.read_csv_kwargs)
+
+
+class DropDirectory:
+    """Parse each file dropped into ``directory`` exactly once, oldest first.
+
+    Drops should be written elsewhere and renamed in; files younger than
+    ``settle_seconds`` are left for the next call in case they are still
+    being written.
+    """
+
+    def __init__(self, directory, pattern="*.csv", reader=pd.read_csv, settle_seconds=1.0):
+        self.directory = directory
+        self.pattern = pattern
+        self.reader = reader
+        self.settle_seconds = settle_seconds
+        self._seen = set()
+
+    def read_new(self):
+        now = time.time()
+        ready = []
+        for path in glob.glob(os.path.join(self.directory, self.pattern)):
+            if path in self._seen:
+                continue
+            mtime = os.path.getmtime(path)
+            if now - mtime >= self.settle_seconds:
+                ready.append((mtime, path))
+        if not ready:
+            return None
+
+        frames = []
+        for _, path in sorted(ready):
+            frames.append(self.reader(path))
+            self._seen.add(path)
+        return pd.concat(frames, ignore_index=True)
+
+
+class ResultsAggregator:
+    """Latest row per department and the running national totals.
+
+    Each results row is a cumulative count for its department, so a newer
+    row replaces the older one and the totals move by the difference.
+    """
+
+    def __init__(self, value_columns, key="Department", timestamp="Timestamp"):
+        self.value_columns = list(value_columns)
+        self.key = key
+        self.timestamp = timestamp
+        self._positions = {}
+        self._keys = []
+        self._values = np.zeros((64, len(self.value_columns)))
+        self._timestamps = []
+        self.totals = np.zeros(len(self.value_columns))
+        self.rows_seen = 0
+
+    def _position(self, key):
+        position = self._positions.get(key)
+        if position is None:
+            position = len(self._keys)
+            if position == len(self._values):
+                self._values = np.concatenate([self._values, np.zeros_like(self._values)])
+            self._positions[key] = position
+            self._keys.append(key)
+            self._timestamps.append(pd.NaT)
+        return position
+
+    def apply(self, rows):
+        """Fold new ``rows`` into the aggregates; returns the departments touched."""
+        if rows is None or len(rows) == 0:
+            return []
+        self.rows_seen += len(rows)
+
+        latest = rows.drop_duplicates(self.key, keep="last")
+        positions = np.array([self._position(key) for key in latest[self.key]])
+        values = latest[self.value_columns].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=float)
+
+        self.totals += (values - self._values[positions]).sum(axis=0)
+        self._values[positions] = values
+        if self.timestamp in latest.columns:
+            for position, stamp in zip(positions, latest[self.timestamp]):
+                self._timestamps[position] = stamp
+        return latest[self.key].tolist()
+
+    def by_department(self):
+        """One row per department with its latest values."""
+        count = len(self._keys)
+        data = pd.DataFrame(self._values[:count], columns=self.value_columns)
+        data.insert(0, self.key, self._keys)
+        data[self.timestamp] = self._timestamps
+        return data
+
+    def column_totals(self):
+        """National totals per value column (votes per candidate, etc.)."""
+        return pd.Series(self.totals, index=self.value_columns)
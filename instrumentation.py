@@ -0,0 +1,252 @@
+"""Latency instrumentation for the dashboard callbacks.
+
+When the dashboard is slow this answers where the time goes: parsing,
+rollups, figure building or JSON serialization. It records:
+
+* ``elections_callback_seconds``: each callback wrapped with ``timed``
+* ``elections_stage_seconds``: ``with stage("figures"):`` blocks inside them,
+  plus Dash's own response serialization as the ``serialize`` stage
+* ``elections_request_seconds`` and ``elections_response_bytes``: the whole
+  ``/_dash-update-component`` request and its payload, per callback
+* gauges from the ``metrics()`` of the caches and stores passed to ``collect``
+
+``install(server)`` exposes them at ``/metrics`` in the Prometheus text
+format. Every worker keeps its own numbers, so scrape the workers
+individually (or sum them in the query).
+
+With ``PROFILE_HZ`` set (e.g. ``PROFILE_HZ=97``) a sampling profiler also
+runs, and ``/metrics/profile`` returns its folded stacks, ready for
+``flamegraph.pl`` or speedscope.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, g, has_app_context, request
+
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1e3, 1e4, 3e4, 1e5, 3e5, 1e6, 3e6, 1e7)
+
+PROFILE_HZ = float(os.environ.get("PROFILE_HZ", 0))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames, buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = list(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, (counts, total, count) in series:
+            for bound, bucket in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', repr(float(bound)))])} {bucket}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = []
+        self.collectors = []
+
+    def histogram(self, name, help, labelnames, buckets=SECONDS_BUCKETS):
+        histogram = Histogram(name, help, labelnames, buckets)
+        self.histograms.append(histogram)
+        return histogram
+
+    def collect(self, prefix, metrics):
+        """Export the numeric values of ``metrics()`` as ``elections_<prefix>_<key>`` gauges."""
+        self.collectors.append((prefix, metrics))
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        for prefix, metrics in self.collectors:
+            try:
+                values = metrics()
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"elections_{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+collect = registry.collect
+
+callback_seconds = registry.histogram(
+    "elections_callback_seconds", "Time spent in each Dash callback function.", ["callback"]
+)
+stage_seconds = registry.histogram(
+    "elections_stage_seconds", "Time spent in named stages inside callbacks.", ["callback", "stage"]
+)
+request_seconds = registry.histogram(
+    "elections_request_seconds", "Whole callback requests, serialization included.", ["callback"]
+)
+response_bytes = registry.histogram(
+    "elections_response_bytes", "Size of callback responses.", ["callback"], BYTES_BUCKETS
+)
+
+
+def current_callback():
+    if has_app_context():
+        return g.get("callback", "other")
+    return "other"
+
+
+def timed(func):
+    """Record the wrapped callback's time; stages inside it are labelled with its name."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if has_app_context():
+            g.callback = func.__name__
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            callback_seconds.observe((func.__name__,), time.perf_counter() - started)
+
+    return wrapper
+
+
+@contextmanager
+def stage(name, callback=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe((callback or current_callback(), name), time.perf_counter() - started)
+
+
+class SamplingProfiler:
+    """Samples every thread's stack ``hz`` times a second into folded stacks."""
+
+    def __init__(self, hz=PROFILE_HZ, max_stacks=20000):
+        self.hz = hz
+        self.max_stacks = max_stacks
+        self.stacks = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.hz > 0:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        interval = 1.0 / self.hz
+        me = threading.get_ident()
+        while True:
+            time.sleep(interval)
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                with self._lock:
+                    if key in self.stacks or len(self.stacks) < self.max_stacks:
+                        self.stacks[key] += 1
+                    self.samples += 1
+
+    def folded(self):
+        """``frame;frame;frame count`` lines, one per distinct stack."""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+
+profiler = SamplingProfiler()
+
+
+def _timed_to_json(to_json):
+    @functools.wraps(to_json)
+    def wrapper(*args, **kwargs):
+        with stage("serialize"):
+            return to_json(*args, **kwargs)
+
+    return wrapper
+
+
+def install(server, path="/metrics"):
+    """Hook request timing into a Flask server and add the metrics endpoints."""
+    import dash._callback
+
+    # Dash serializes callback results after the function returns; time that too
+    if not getattr(dash._callback.to_json, "__wrapped__", None):
+        dash._callback.to_json = _timed_to_json(dash._callback.to_json)
+
+    @server.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @server.after_request
+    def record_request(response):
+        if request.path.endswith("/_dash-update-component") and "request_started" in g:
+            callback = current_callback()
+            request_seconds.observe((callback,), time.perf_counter() - g.request_started)
+            if not response.direct_passthrough:
+                response_bytes.observe((callback,), response.calculate_content_length() or 0)
+        return response
+
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    def profile():
+        return Response(profiler.folded(), mimetype="text/plain")
+
+    server.add_url_rule(path, "metrics", metrics)
+    server.add_url_rule(path + "/profile", "metrics_profile", profile)
+    profiler.start()
+    collect("profiler", lambda: {"samples": profiler.samples, "stacks": len(profiler.stacks)})
+    return registry
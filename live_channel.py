@@ -0,0 +1,155 @@
+"""Server-sent events channel for live results.
+
+Every open dashboard used to poll the server every 10 seconds, and each poll
+ran the dashboard, results table and sentiment callbacks whether or not
+anything had changed. Here one broadcaster thread per worker watches the
+data, builds an event once per change, serializes it once, and hands the
+same bytes to every browser subscribed to ``/live/stream``. The browser only
+runs the callbacks when an event tells it the data moved.
+
+Each open stream holds a thread for its lifetime, so run gunicorn with
+threaded workers (see the Procfile). A worker takes at most
+``max_subscribers`` streams, well below its thread count, so callbacks and
+polls always find a free thread. Browsers beyond that get a ``full`` event
+and the stream is closed; they poll and try the stream again later.
+Subscribers that fall behind lose their oldest queued events, never the
+latest one.
+"""
+import itertools
+import queue
+import threading
+import time
+
+from flask import Response
+
+from figure_cache import dumps
+
+
+class LiveChannel:
+    """Broadcast ``watch(previous_event)`` results to stream subscribers.
+
+    ``watch`` is polled every ``poll_seconds`` and returns ``None`` while
+    nothing has changed, or the new event as a JSON-able dict.
+    """
+
+    def __init__(self, watch, poll_seconds=1.0, heartbeat_seconds=15.0, queue_size=8, max_subscribers=48, full_retry_seconds=30):
+        self.watch = watch
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.full_retry_seconds = full_retry_seconds
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._ids = itertools.count(1)
+        self.event = None
+        self._payload = None
+        self.published = 0
+        self.dropped = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-channel", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self.poll()
+            time.sleep(self.poll_seconds)
+
+    def poll(self):
+        """Check for a change once; returns the published event, if any."""
+        try:
+            event = self.watch(self.event)
+        except Exception:
+            # A half-written file or a locked database; try again next poll
+            self.errors += 1
+            return None
+        if event is not None:
+            self.publish(event)
+        return event
+
+    def publish(self, event):
+        payload = b"id: %d\nevent: results\ndata: %s\n\n" % (next(self._ids), dumps(event))
+        with self._lock:
+            self.event = event
+            self._payload = payload
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._offer(subscriber, payload)
+        self.published += 1
+
+    def _offer(self, subscriber, payload):
+        while True:
+            try:
+                subscriber.put_nowait(payload)
+                return
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def subscribe(self):
+        """A queue of event payloads, or None when the worker has no room."""
+        subscriber = queue.Queue(self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            self._subscribers.add(subscriber)
+            payload = self._payload
+        # New subscribers start from the current state
+        if payload is not None:
+            subscriber.put_nowait(payload)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self):
+        subscriber = self.subscribe()
+        if subscriber is None:
+            # Free the thread at once; the browser polls until it retries
+            yield b"event: full\ndata: {\"retry\": %d}\n\n" % self.full_retry_seconds
+            return
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    # Keeps proxies from closing an idle connection
+                    yield b": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def register(self, server, path="/live/stream"):
+        """Add the stream endpoint to a Flask server and start broadcasting."""
+
+        def live_stream():
+            return Response(
+                self.stream(),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        server.add_url_rule(path, "live_stream", live_stream)
+        return self.start()
+
+    def metrics(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "rejected": self.rejected,
+        }
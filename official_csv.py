@@ -0,0 +1,155 @@
+"""Reader for the electoral commission's raw results csv.
+
+The commission publishes ``elections_senegal.csv``-style files:
+
+* ``;`` separators, CRLF line endings and a UTF-8 BOM (or cp1252, no BOM)
+* French thousands separators: ``663 021``, sometimes with a no-break space
+* decimal commas in percentage columns
+* a header split over two lines where a name doesn't fit
+  (``Ousmane`` on the first, ``SONKO`` on the second)
+* French, accented column names (``Département``, ``Exprimés``)
+
+``iter_official`` streams the file in blocks of whole lines. Each block is
+parsed by pandas' C tokenizer with the French number format, so numbers
+are converted without any per-cell Python. Every block comes out as a
+frame with the dashboards' column names, int64 counts (nullable ``Int64``
+where cells are blank) and canonical department spellings. ``read_official``
+concatenates the blocks, and can be used as a ``columnar_cache`` or
+``DropDirectory`` reader:
+
+    read_cached("elections_senegal.csv", reader=read_official)
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from dimensions import canonical_columns, department_codes
+
+
+CHUNK_BYTES = 8 * 2**20
+BOM = b"\xef\xbb\xbf"
+
+# No-break and narrow no-break spaces used as thousands separators
+THOUSANDS = {"utf-8": [b"\xc2\xa0", b"\xe2\x80\xaf"], "cp1252": [b"\xa0"]}
+
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source), True
+    if hasattr(source, "read"):
+        return source, False
+    return open(source, "rb"), True
+
+
+def _encoding(header):
+    try:
+        header.decode("utf-8")
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8"
+
+
+def _fields(line, encoding):
+    return [field.strip() for field in line.rstrip(b"\r\n").decode(encoding, errors="replace").split(";")]
+
+
+def read_header(stream):
+    """Column names and encoding, leaving ``stream`` at the first data line.
+
+    Lines after the first whose first field is empty and which hold no
+    numbers continue the header; their fields are appended to the names
+    above them.
+    """
+    first = stream.readline()
+    if first.startswith(BOM):
+        first = first[len(BOM):]
+    encoding = _encoding(first)
+    names = _fields(first, encoding)
+
+    while True:
+        position = stream.tell()
+        line = stream.readline()
+        fields = _fields(line, encoding)
+        if not line or fields[0] or any(field.replace(" ", "").isdigit() for field in fields):
+            stream.seek(position)
+            break
+        names += [""] * (len(fields) - len(names))
+        names = [" ".join(part for part in pair if part) for pair in zip(names, fields + [""] * len(names))]
+
+    names = [name or f"Unnamed: {i}" for i, name in enumerate(names)]
+    return list(canonical_columns(pd.DataFrame(columns=names)).columns), encoding
+
+
+def _blocks(stream, chunk_bytes):
+    carry = b""
+    while True:
+        block = stream.read(chunk_bytes)
+        if not block:
+            break
+        block = carry + block
+        end = block.rfind(b"\n") + 1
+        if end == 0:
+            carry = block
+            continue
+        carry = block[end:]
+        yield block[:end]
+    if carry.strip():
+        yield carry
+
+
+def _typed(frame, key):
+    """Canonical departments and integer counts for one parsed block."""
+    # Rows that are nothing but separators
+    empty = frame.isna().all(axis=1)
+    if empty.any():
+        frame = frame[~empty].copy()
+
+    for column in frame.columns:
+        values = frame[column]
+        if column == key:
+            # Only the distinct names are cleaned up
+            codes, uniques = pd.factorize(values)
+            canonical = np.array([department_codes.label(label.strip()) for label in uniques] + [None], dtype=object)
+            frame[column] = canonical[codes]
+            continue
+        if values.dtype == object:
+            values = pd.to_numeric(values.astype(str).str.replace(" ", "", regex=False), errors="coerce")
+        if values.dtype.kind == "f" and (values.dropna() % 1 == 0).all():
+            values = values.astype("Int64") if values.isna().any() else values.astype(np.int64)
+        frame[column] = values
+    return frame
+
+
+def iter_official(source, chunk_bytes=CHUNK_BYTES, key="Department"):
+    """Typed frames for successive blocks of an official results csv."""
+    stream, owned = _open(source)
+    try:
+        names, encoding = read_header(stream)
+        for block in _blocks(stream, chunk_bytes):
+            for separator in THOUSANDS[encoding]:
+                if separator in block:
+                    block = block.replace(separator, b" ")
+            frame = pd.read_csv(
+                io.BytesIO(block),
+                sep=";",
+                header=None,
+                names=names,
+                thousands=" ",
+                decimal=",",
+                encoding=encoding,
+                dtype={key: object},
+                skip_blank_lines=True,
+            )
+            yield _typed(frame, key)
+    finally:
+        if owned:
+            stream.close()
+
+
+def read_official(source, chunk_bytes=CHUNK_BYTES, key="Department"):
+    """The whole file as one frame; see ``iter_official``."""
+    frames = list(iter_official(source, chunk_bytes, key))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
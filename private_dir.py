@@ -0,0 +1,44 @@
+"""Private directories for the files the workers on a host share.
+
+Snapshots and caches used to go to fixed names under the system temp dir.
+Every deployment on the host shared them, and anyone able to write there
+could plant files that the workers load (pickles run code). ``app_path``
+scopes a directory to the user and to this checkout of the app, and
+``private_directory`` creates it 0700 and refuses one owned by anyone else.
+"""
+import hashlib
+import os
+import stat
+import tempfile
+
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def path_key(path):
+    """A short, stable key for a file or directory, from its absolute path."""
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+
+
+def app_path(name):
+    """``<tmp>/elections-<user>-<checkout>/<name>``; not created until used."""
+    user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "user")
+    return os.path.join(tempfile.gettempdir(), f"elections-{user}-{path_key(APP_ROOT)}", name)
+
+
+def private_directory(path):
+    """Create ``path`` (and a missing parent) for this user only; returns it."""
+    parent = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(parent):
+        private_directory(parent)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        # Windows: the temp dir is already per user
+        return path
+
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a directory owned by this user; refusing to share files through it")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
@@ -0,0 +1,111 @@
+"""Chunked ingestion of the hourly Dakar rain station readings.
+
+``rain_data.csv`` is a ``;``-separated export that went through Excel:
+
+* decimals typed as ``4.5`` or ``25.3`` were turned into dates and come
+  back as ``04.May`` and ``25.Mar`` (French exports give ``04.mai``)
+* other decimals use a comma (``13,70588235``), some a dot (``25.48``)
+* timestamps are ``05.04.2023 8:00``
+
+``iter_rain`` reads ``chunk_rows`` rows at a time. It repairs those values
+with vectorized string operations (``repair_decimal``) and returns compact
+frames:
+- float32 readings
+- an int16 ``Area_ID``
+- a categorical ``Area_Name``
+- an int8 ``Flood_Status`` (0 for No, 1 for Yes, -1 when missing)
+
+dakar_rain.py trains on these chunks one at a time, so the size of the
+history doesn't decide the memory needed.
+"""
+import numpy as np
+import pandas as pd
+
+from dimensions import Dimension
+
+
+CHUNK_ROWS = 100_000
+
+FEATURES = ["Rainfall_mm", "Temperature_C", "Wind_Speed_kmph", "Elevation_m", "Population_Density", "Flood_History_Count"]
+TARGET = "Flood_Status"
+TIMESTAMP_FORMAT = "%d.%m.%Y %H:%M"
+
+# Flood_Status as the model's labels; anything else becomes -1
+STATUS = {"no": 0, "yes": 1, "non": 0, "oui": 1}
+
+# English and French month abbreviations, as Excel writes them back out
+MONTHS = {
+    "jan": 1, "janv": 1, "feb": 2, "fev": 2, "fevr": 2, "mar": 3, "mars": 3,
+    "apr": 4, "avr": 4, "may": 5, "mai": 5, "jun": 6, "juin": 6, "jul": 7, "juil": 7,
+    "aug": 8, "aou": 8, "aout": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Area names, with their spellings ("Medina", "MÃ©dina") folded together
+area_codes = Dimension("Area")
+
+
+def repair_decimal(values):
+    """Floats from text decimals, including the ones Excel turned into dates.
+
+    ``04.May`` was typed as ``4.5``: the day is the integer part and the
+    month number the digits after the point, so ``25.Oct`` is ``25.10``.
+    """
+    # Readings repeat a lot; only the distinct strings are repaired
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    text = pd.Series(uniques, dtype="string").str.strip()
+    numbers = pd.to_numeric(text.str.replace(",", ".", regex=False), errors="coerce")
+
+    mangled = numbers.isna() & text.notna()
+    if mangled.any():
+        parts = text[mangled].str.extract(r"^(\d+)[.\-/ ]([^\W\d_]+)\.?$")
+        month_names = parts[1].str.lower().str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+        months = month_names.map(MONTHS).astype("float64")
+        digits = np.where(months >= 10, 100.0, 10.0)
+        numbers[mangled] = pd.to_numeric(parts[0], errors="coerce") + months / digits
+
+    repaired = np.append(numbers.to_numpy(dtype=np.float32, na_value=np.nan), np.float32(np.nan))
+    return pd.Series(repaired[codes], index=getattr(values, "index", None))
+
+
+def compact(chunk):
+    """Typed, compact columns for one chunk read as text."""
+    data = pd.DataFrame(index=chunk.index)
+    if "Timestamp" in chunk:
+        data["Timestamp"] = pd.to_datetime(chunk["Timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+    if "Area_ID" in chunk:
+        # Area IDs are whole numbers; the interpolated rows of the sheet carry fractions
+        data["Area_ID"] = np.rint(repair_decimal(chunk["Area_ID"]).fillna(-1)).astype(np.int16)
+    if "Area_Name" in chunk:
+        data["Area_Name"] = area_codes.categorical(area_codes.encode(chunk["Area_Name"].to_numpy(), add=True))
+    for column in FEATURES:
+        if column in chunk:
+            data[column] = repair_decimal(chunk[column])
+    if TARGET in chunk:
+        codes, uniques = pd.factorize(chunk[TARGET])
+        status = pd.Series(uniques, dtype="string").str.strip().str.lower().map(STATUS).fillna(-1)
+        data[TARGET] = np.append(status.to_numpy(dtype=np.int8), np.int8(-1))[codes]
+    return data
+
+
+def iter_rain(path, chunk_rows=CHUNK_ROWS):
+    """Compact frames of ``chunk_rows`` readings at a time; see ``compact``."""
+    reader = pd.read_csv(
+        path,
+        sep=";",
+        encoding="utf-8-sig",
+        dtype=str,
+        chunksize=chunk_rows,
+        skipinitialspace=True,
+    )
+    with reader:
+        for chunk in reader:
+            yield compact(chunk)
+
+
+def read_rain(path, chunk_rows=CHUNK_ROWS):
+    """The whole file as one compact frame."""
+    frames = list(iter_rain(path, chunk_rows))
+    data = pd.concat(frames, ignore_index=True)
+    # Later chunks may have met more areas than earlier ones
+    data["Area_Name"] = area_codes.categorical(area_codes.encode(data["Area_Name"].astype(object).to_numpy()))
+    return data
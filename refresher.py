@@ -0,0 +1,233 @@
+"""Background refresh of live data, one refresher per host.
+
+A ``Refresher`` runs ``refresh()`` on a daemon thread every ``interval``
+seconds. ``refresh`` checks its source for changes (an mtime, a file
+offset) and returns the new value, or ``None`` when nothing changed.
+Each new value is published as an immutable ``Published`` snapshot.
+Readers call ``current()`` once per callback and use that snapshot
+throughout, so they never see half of one refresh and half of the next.
+
+Only one process per host refreshes: whichever holds the ``flock`` on
+``<directory>/<key>.lock``. It writes every new snapshot to
+``<directory>/<key>.pickle``. The other workers watch that file's mtime
+and load it when it changes. If the refreshing process exits, its lock is
+released and another worker takes over on its next poll. Failed refreshes
+back off exponentially up to ``max_backoff`` seconds.
+
+With a ``source`` file the key is the name plus a hash of the file's
+absolute path, so two deployments never elect one leader between them.
+Every snapshot records the file's signature (device, inode, size, mtime).
+A follower takes a snapshot up only when it is of the file now on disk
+(compared with a fresh ``os.stat``) and no older than the value it
+holds of that file. A previous run's pickle, or one from before the file
+was replaced, is ignored. The leader's first snapshot of a replacement
+file is accepted.
+
+The directory defaults to ``REFRESHER_DIR`` or a private (0700)
+directory for this user and checkout under the system temp dir. The
+thread is a daemon and is stopped at exit, so it never holds up a
+gunicorn shutdown. It is restarted in a forked child (``--preload``) the
+first time that child calls ``current()``.
+"""
+import atexit
+import os
+import pickle
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process refreshes for itself
+    fcntl = None
+
+from private_dir import app_path, path_key, private_directory
+
+
+DEFAULT_DIRECTORY = os.environ.get("REFRESHER_DIR") or app_path("refresher")
+
+
+@dataclass(frozen=True)
+class Published:
+    version: int
+    value: object
+    refreshed_at: float
+    source: tuple = None
+
+
+def signature(path):
+    """Device, inode, size and mtime of ``path``; None if it doesn't exist."""
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns)
+
+
+def covers(theirs, ours, current):
+    """Whether a snapshot of ``theirs`` should replace one of ``ours``.
+
+    ``current`` is the signature of the source file on disk now. Only a
+    snapshot of that file is taken up, and then unless ours is a later
+    snapshot of the same file.
+    """
+    if theirs is None or current is None or theirs[:2] != current[:2]:
+        return False
+    if ours is not None and ours[:2] == current[:2]:
+        return theirs[2] >= ours[2] and theirs[3] >= ours[3]
+    # Ours is of a file that has since been replaced
+    return True
+
+
+class Refresher:
+    def __init__(self, refresh, name, initial=None, source=None, interval=5.0, max_backoff=60.0, directory=DEFAULT_DIRECTORY):
+        self.refresh = refresh
+        self.name = name
+        self.source = source
+        self.key = f"{name}-{path_key(source)}" if source is not None else name
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.directory = directory
+        self._published = Published(0, initial, time.time(), self._signature())
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock_file = None
+        self._shared_mtime = None
+        self.refreshes = 0
+        self.loads = 0
+        self.failures = 0
+        self.last_refresh_seconds = 0.0
+        self.ignored = 0
+        # Pickles are only loaded from a directory nobody else can write to
+        private_directory(directory)
+        atexit.register(self.stop)
+
+    @property
+    def _shared_path(self):
+        return os.path.join(self.directory, f"{self.key}.pickle")
+
+    def _signature(self):
+        return signature(self.source) if self.source is not None else None
+
+    def current(self):
+        """The latest snapshot; hold on to it rather than calling again mid-callback."""
+        if self._pid is not None and self._pid != os.getpid():
+            self._after_fork()
+        return self._published
+
+    @property
+    def leader(self):
+        return self._lock_file is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=f"refresher-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        with self._lock:
+            self._thread = None
+            self._release()
+
+    def _after_fork(self):
+        # Threads and flocks don't survive a fork; the child starts its own
+        with self._lock:
+            self._thread = None
+            self._lock_file = None
+        self.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.step()
+                delay = self.interval
+            except Exception:
+                # A half-written source or a full disk; back off and retry
+                self.failures += 1
+                delay = min(self.interval * 2 ** min(self.failures, 16), self.max_backoff)
+            else:
+                self.failures = 0
+            self._stop.wait(delay)
+
+    def step(self):
+        """One poll: refresh if we lead, otherwise pick up the leader's snapshot."""
+        if self.leader or self._acquire():
+            started = time.perf_counter()
+            # Taken first: the value covers at least this much of the source
+            source = self._signature()
+            value = self.refresh()
+            if value is not None:
+                self._publish(value, source)
+                self.refreshes += 1
+            self.last_refresh_seconds = time.perf_counter() - started
+        else:
+            self._load_shared()
+
+    def _acquire(self):
+        if fcntl is None:
+            self._lock_file = True
+            return True
+        handle = open(os.path.join(self.directory, f"{self.key}.lock"), "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_file = handle
+        # Carry on from the previous leader's version numbers
+        self._load_shared()
+        return True
+
+    def _release(self):
+        handle, self._lock_file = self._lock_file, None
+        if handle not in (None, True):
+            handle.close()
+
+    def _publish(self, value, source=None):
+        published = Published(self._published.version + 1, value, time.time(), source)
+        tmp = f"{self._shared_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(published, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._shared_path)
+        self._shared_mtime = os.stat(self._shared_path).st_mtime_ns
+        self._published = published
+
+    def _load_shared(self):
+        try:
+            mtime = os.stat(self._shared_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._shared_mtime:
+            return
+        with open(self._shared_path, "rb") as f:
+            published = pickle.load(f)
+        self._shared_mtime = mtime
+        if self.source is not None and not covers(published.source, self._published.source, self._signature()):
+            # Another run's snapshot, or an older one than we already hold
+            self.ignored += 1
+            return
+        if published.version > self._published.version:
+            self._published = published
+            self.loads += 1
+
+    def metrics(self):
+        return {
+            "version": self._published.version,
+            "leader": int(self.leader),
+            "refreshes": self.refreshes,
+            "loads": self.loads,
+            "ignored": self.ignored,
+            "failures": self.failures,
+            "last_refresh_seconds": self.last_refresh_seconds,
+        }
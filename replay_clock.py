@@ -0,0 +1,159 @@
+"""Replay clock shared by every worker on the host.
+
+The old replay cursor was a module global bumped on every call, so each
+gunicorn worker (and every asset request) moved it at its own pace. The
+clock instead derives the replay position from wall time: the epoch and
+speed live in a small SQLite file, the first worker to start writes them
+and every other worker reads the same row. Any worker asking "where is the
+replay now?" gets the same answer without talking to the others.
+
+The row belongs to one run of the app (``boot_id``): the start of the
+server process. Under gunicorn that is the master, and gunicorn.conf.py
+pins it in ``REPLAY_BOOT`` before the workers are forked. All workers
+share it, so a worker restarted by the master carries on. Run alone
+(``python elections2.py``), the app's own process is the server.
+Restarting or redeploying starts a new run, whose first worker starts the
+replay again with the current ``REPLAY_SPEED``.
+
+When workers don't share one master (several dynos or containers), set
+``REPLAY_BOOT`` to the same value in all of them, e.g. the release id, so
+they replay together and a new release starts a fresh replay. To restart
+the replay of a running app:
+
+    python replay_clock.py reset [--speed 0.5]
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+
+DEFAULT_PATH = os.environ.get("REPLAY_CLOCK_PATH", "replay_clock.sqlite")
+
+# Replay seconds per wall-clock second. The sample data has a row every
+# 2 seconds, so 0.2 reveals one row per 10 second interval tick.
+DEFAULT_SPEED = float(os.environ.get("REPLAY_SPEED", 0.2))
+
+
+# Stands in for the process start time where /proc isn't available
+_IMPORTED_AT = time.time()
+
+
+def _process_started(pid):
+    try:
+        # Field 22 is the start time; it tells a reused pid apart
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _is_gunicorn(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"gunicorn" in f.read()
+    except OSError:
+        return False
+
+
+def boot_id():
+    """This run of the app: the server process, and when it started.
+
+    ``REPLAY_BOOT`` when set (gunicorn.conf.py sets it in the master), else
+    the gunicorn master this worker was forked from, else this process.
+    """
+    if os.environ.get("REPLAY_BOOT"):
+        return os.environ["REPLAY_BOOT"]
+    parent = os.getppid()
+    if _is_gunicorn(parent):
+        return f"{parent}:{_process_started(parent)}"
+    pid = os.getpid()
+    return f"{pid}:{_process_started(pid) or _IMPORTED_AT}"
+
+
+class ReplayClock:
+    def __init__(self, path=DEFAULT_PATH, name="default", speed=DEFAULT_SPEED, refresh_seconds=1.0, boot=None):
+        self.path = path
+        self.name = name
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        # A clock row from an earlier run restarts; one from this run is kept
+        self._execute(
+            "INSERT INTO replay (name, started_at, speed, boot) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET started_at = excluded.started_at, speed = excluded.speed, boot = excluded.boot"
+            " WHERE replay.boot IS NOT excluded.boot",
+            (name, time.time(), speed, boot_id() if boot is None else boot),
+        )
+        self._load()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("CREATE TABLE IF NOT EXISTS replay (name TEXT PRIMARY KEY, started_at REAL, speed REAL, boot TEXT)")
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(replay)")]
+        if "boot" not in columns:
+            # Clock files written before rows had a run
+            connection.execute("ALTER TABLE replay ADD COLUMN boot TEXT")
+        return connection
+
+    def _execute(self, sql, params=()):
+        with self._connect() as connection:
+            return connection.execute(sql, params).fetchone()
+
+    def _load(self):
+        self.started_at, self.speed = self._execute("SELECT started_at, speed FROM replay WHERE name = ?", (self.name,))
+        self._checked_at = time.monotonic()
+
+    def reset(self, started_at=None, speed=None):
+        """Restart the replay for every worker."""
+        with self._lock:
+            self._execute(
+                "UPDATE replay SET started_at = ?, speed = ? WHERE name = ?",
+                (time.time() if started_at is None else started_at, self.speed if speed is None else speed, self.name),
+            )
+            self._load()
+
+    def elapsed(self, now=None):
+        """Replay seconds since the start."""
+        # Re-read the row now and then so a reset from another worker is seen
+        if time.monotonic() - self._checked_at > self.refresh_seconds:
+            with self._lock:
+                self._load()
+        now = time.time() if now is None else now
+        return max(now - self.started_at, 0.0) * self.speed
+
+    def replay_time(self, start, now=None):
+        """The data timestamp the replay has reached, counting from ``start``."""
+        return start + pd.Timedelta(seconds=self.elapsed(now))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restart the replay for every worker")
+    parser.add_argument("command", choices=["reset", "show"])
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--name", default="default")
+    parser.add_argument("--speed", type=float, help="replay seconds per second; default: keep the current speed")
+    args = parser.parse_args()
+
+    # Keep the running app's row: reset it rather than claiming a new run
+    clock = ReplayClock(args.path, args.name, speed=DEFAULT_SPEED if args.speed is None else args.speed, boot=_current_boot(args.path, args.name))
+    if args.command == "reset":
+        clock.reset(speed=args.speed)
+    print(f"{args.name}: started {time.ctime(clock.started_at)}, speed {clock.speed}, elapsed {clock.elapsed():.0f} replay seconds")
+
+
+def _current_boot(path, name):
+    """The run that owns the clock row; this one when there is none yet."""
+    with sqlite3.connect(path, timeout=5) as connection:
+        try:
+            row = connection.execute("SELECT boot FROM replay WHERE name = ?", (name,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+    return row[0] if row and row[0] else boot_id()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Generate replay datasets: every source row reported several times, in time order.
+
+The dashboards replay results as if they arrived during election night.
+A replay dataset repeats each row of a results sheet ``fan_out`` times.
+Every output row gets the next timestamp, ``step_seconds`` after the
+previous one, optionally plus a random jitter. With ``grow`` the counts
+also build up over a row's reports, from ``1/fan_out`` of the final count
+to all of it.
+
+Rows are produced in chunks by repeated indexing and vectorized timestamp
+arithmetic. Output is streamed to csv or parquet (parquet needs pyarrow).
+xlsx is written in one go, followed by its columnar sidecar:
+
+    python replay_dataset.py elections_senegal.xlsx new_elections_data.xlsx --fan-out 3 --step-seconds 2
+    python replay_dataset.py elections_senegal.csv replay.csv --fan-out 200 --span-seconds 86399 --seed 1
+
+Timestamps are "HH:MM:SS" times of day (what ``read_results`` expects), or
+full datetimes with ``--time-format datetime``.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import build_cache, read_cached
+from official_csv import read_official
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+CHUNK_ROWS = 500_000
+SECONDS_PER_DAY = 24 * 3600
+
+_TWO_DIGITS = np.array([f"{i:02d}" for i in range(60)])
+
+
+def format_times(seconds):
+    """"HH:MM:SS" strings for whole seconds since midnight, without a Python loop."""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    if len(seconds) and (seconds.min() < 0 or seconds.max() >= SECONDS_PER_DAY):
+        raise ValueError("times of day must stay within one day; use a smaller step or datetime timestamps")
+    hours, rest = np.divmod(seconds, 3600)
+    minutes, secs = np.divmod(rest, 60)
+    text = np.char.add(np.char.add(_TWO_DIGITS[hours], ":"), np.char.add(_TWO_DIGITS[minutes], ":"))
+    return np.char.add(text, _TWO_DIGITS[secs]).astype(object)
+
+
+def read_source(path):
+    """A results sheet: the commission's raw csv, or any xlsx/csv the cache can read."""
+    if str(path).lower().endswith(".csv"):
+        with open(path, "rb") as f:
+            header = f.readline()
+        if header.count(b";") > header.count(b","):
+            return read_official(path)
+    return read_cached(path)
+
+
+def iter_replay(
+    frame,
+    fan_out=3,
+    step_seconds=2.0,
+    start="00:00:00",
+    jitter_seconds=0.0,
+    grow=False,
+    time_format="time",
+    timestamp="Timestamp",
+    seed=None,
+    chunk_rows=CHUNK_ROWS,
+):
+    """Frames of consecutive replay rows; together they form the whole dataset.
+
+    Row ``i`` of the output is a report of source row ``i // fan_out``,
+    stamped ``start + (i + 1) * step_seconds`` plus the jitter so far.
+    """
+    rng = np.random.default_rng(seed)
+    frame = frame.drop(columns=[timestamp], errors="ignore").reset_index(drop=True)
+    counts = [column for column in frame.columns if pd.api.types.is_numeric_dtype(frame[column].dtype)]
+    origin = pd.Timestamp(start) if time_format == "datetime" else pd.Timedelta(start)
+    step = np.int64(round(step_seconds * 1e9))
+    total = len(frame) * fan_out
+    offset = np.int64(0)
+
+    for begin in range(0, total, chunk_rows):
+        rows = np.arange(begin, min(begin + chunk_rows, total))
+        chunk = frame.iloc[rows // fan_out].reset_index(drop=True)
+
+        if grow:
+            share = (rows % fan_out + 1) / fan_out
+            for column in counts:
+                values = chunk[column].to_numpy()
+                chunk[column] = np.rint(values * share).astype(values.dtype) if values.dtype.kind in "iu" else values * share
+
+        # Each step is at least step_seconds; jitter only ever delays
+        steps = np.full(len(rows), step)
+        if jitter_seconds:
+            steps += rng.integers(0, np.int64(jitter_seconds * 1e9) + 1, len(rows))
+        nanos = offset + np.cumsum(steps)
+        offset = nanos[-1]
+
+        if time_format == "datetime":
+            chunk[timestamp] = origin + pd.to_timedelta(nanos, unit="ns")
+        else:
+            chunk[timestamp] = format_times((origin.value + nanos) // 10**9)
+        yield chunk
+
+
+def expand(frame, **options):
+    """The whole replay dataset as one frame; see ``iter_replay``."""
+    return pd.concat(list(iter_replay(frame, **options)), ignore_index=True)
+
+
+def write_replay(chunks, path, index=False, sidecar=True):
+    """Stream ``chunks`` to ``path``; the format follows the extension."""
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension not in (".csv", ".parquet", ".xlsx", ".xls"):
+        raise ValueError(f"unsupported output format: {path}")
+    tmp = f"{path}.tmp{extension}"
+    try:
+        rows = _write(chunks, tmp, extension, index)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    os.replace(tmp, path)
+    if sidecar and extension != ".parquet":
+        # Dashboards read the replay through its columnar sidecar
+        build_cache(path)
+    return rows
+
+
+def _write(chunks, tmp, extension, index):
+    rows = 0
+    if extension == ".csv":
+        with open(tmp, "w", newline="") as f:
+            for chunk in chunks:
+                chunk.index += rows
+                chunk.to_csv(f, index=index, header=rows == 0)
+                rows += len(chunk)
+    elif extension == ".parquet":
+        if pyarrow is None:
+            raise RuntimeError("writing parquet needs pyarrow")
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(tmp, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        data = pd.concat(list(chunks), ignore_index=True)
+        data.to_excel(tmp, index=index)
+        rows = len(data)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="results sheet (xlsx, csv or the commission's raw csv)")
+    parser.add_argument("output", help="replay dataset to write (.csv, .parquet or .xlsx)")
+    parser.add_argument("--fan-out", type=int, default=3, help="reports per source row")
+    parser.add_argument("--step-seconds", type=float, default=2.0, help="time between consecutive reports")
+    parser.add_argument("--span-seconds", type=float, help="spread all reports over this long instead of --step-seconds")
+    parser.add_argument("--jitter-seconds", type=float, default=0.0, help="random extra delay added to each step")
+    parser.add_argument("--start", default=None, help='first time: "HH:MM:SS", or a date and time with --time-format datetime')
+    parser.add_argument("--time-format", choices=["time", "datetime"], default="time")
+    parser.add_argument("--grow", action="store_true", help="counts build up over each row's reports")
+    parser.add_argument("--underscore-columns", action="store_true", help='"Macky SALL" becomes "Macky_SALL"')
+    parser.add_argument("--index", action="store_true", help="write the row number as the first column")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    frame = read_source(args.source)
+    if args.underscore_columns:
+        frame = frame.rename(columns=lambda name: str(name).replace(" ", "_"))
+    step_seconds = args.step_seconds
+    if args.span_seconds is not None:
+        # Leave room for the jitter so the last report still falls within the span
+        step_seconds = max(args.span_seconds / max(len(frame) * args.fan_out, 1) - args.jitter_seconds, 0)
+    start = args.start or ("2022-01-01 00:00:00" if args.time_format == "datetime" else "00:00:00")
+
+    chunks = iter_replay(
+        frame,
+        fan_out=args.fan_out,
+        step_seconds=step_seconds,
+        start=start,
+        jitter_seconds=args.jitter_seconds,
+        grow=args.grow,
+        time_format=args.time_format,
+        seed=args.seed,
+        chunk_rows=args.chunk_rows,
+    )
+    rows = write_replay(chunks, args.output, index=args.index)
+    print(f"{args.output}: {rows} rows from {len(frame)} source rows")
+
+
+if __name__ == "__main__":
+    main()
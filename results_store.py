@@ -0,0 +1,131 @@
+"""Parse-once results store.
+
+The dashboards used to call ``pd.read_excel`` on every request and every
+interval tick. A ``ResultsStore`` parses its source once, keeps the parsed
+frame in memory and only re-parses when the file's mtime or size changes.
+Callers get a frozen ``Snapshot``; its ``data`` frame is shared between all
+callbacks, so take a copy before mutating it.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import read_cached
+
+
+# Day used to turn the "HH:MM:SS" replay timestamps into full datetimes
+REPLAY_DATE = "2022-04-10"
+
+
+def read_results(path):
+    """Read a timestamped results sheet into a frame with UTC timestamps, in time order."""
+    data = read_cached(path)
+    data["Timestamp"] = pd.to_datetime(REPLAY_DATE + " " + data["Timestamp"].astype(str), utc=True, format="%Y-%m-%d %H:%M:%S")
+    if not data["Timestamp"].is_monotonic_increasing:
+        # Feeds don't promise order; rows with the same time keep theirs
+        data = data.sort_values("Timestamp", kind="stable", ignore_index=True)
+    return data
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    data: pd.DataFrame
+    mtime_ns: int
+    size: int
+    loaded_at: float
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def fingerprint(self):
+        """Identifies the source contents the same way in every worker process."""
+        return f"{self.mtime_ns}-{self.size}"
+
+    @cached_property
+    def timestamps(self):
+        """When each leading slice is complete, as int64 nanoseconds.
+
+        ``read_results`` sorts by time, so this is the ``Timestamp`` column.
+        For data from other loaders that isn't sorted, a row counts as
+        reported once every row before it has been (a running maximum).
+        """
+        values = self.data["Timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        if len(values) > 1 and (np.diff(values) < 0).any():
+            values = np.maximum.accumulate(values)
+        return values
+
+    @property
+    def start(self):
+        return self.data["Timestamp"].iloc[0] if len(self.data) else None
+
+    def rows_as_of(self, timestamp):
+        """Number of rows with ``Timestamp <= timestamp`` (at least one, as the replay always shows a row)."""
+        rows = int(np.searchsorted(self.timestamps, pd.Timestamp(timestamp).value, side="right"))
+        return min(max(rows, 1), len(self.data))
+
+    def as_of(self, timestamp):
+        """The rows reported up to ``timestamp``; a leading slice, not a copy."""
+        return self.data.iloc[:self.rows_as_of(timestamp)]
+
+
+class ResultsStore:
+    """Serve parsed snapshots of ``path``, reloading only when the file changes."""
+
+    def __init__(self, path, loader=pd.read_excel):
+        self.path = path
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.reload_count = 0
+        self.last_parse_seconds = 0.0
+        self.total_parse_seconds = 0.0
+
+    def _signature(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        try:
+            signature = self._signature()
+        except FileNotFoundError:
+            # The source is being replaced; keep serving what we have
+            if snapshot is not None:
+                return snapshot
+            raise
+
+        if snapshot is not None and (snapshot.mtime_ns, snapshot.size) == signature:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and (snapshot.mtime_ns, snapshot.size) == signature:
+                return snapshot
+
+            start = time.perf_counter()
+            data = self.loader(self.path)
+            elapsed = time.perf_counter() - start
+
+            version = snapshot.version + 1 if snapshot is not None else 1
+            self._snapshot = Snapshot(version, data, signature[0], signature[1], time.time())
+            self.reload_count += 1
+            self.last_parse_seconds = elapsed
+            self.total_parse_seconds += elapsed
+            return self._snapshot
+
+    def metrics(self):
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot is not None else 0,
+            "rows": len(snapshot) if snapshot is not None else 0,
+            "reload_count": self.reload_count,
+            "last_parse_seconds": self.last_parse_seconds,
+            "total_parse_seconds": self.total_parse_seconds,
+        }
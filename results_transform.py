@@ -0,0 +1,104 @@
+"""Shared results transform for the dashboards.
+
+``WideResults`` keeps the results in their natural wide shape: one row per
+results row, one column per candidate. Every candidate's percentage comes
+out of a single division over the 2D vote matrix. The long/tidy frame the
+plotly express charts want is only built when something asks for it.
+Departments and candidates also carry their ``dimensions`` codes, which
+the filters and group-bys use instead of the strings.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from dimensions import CANDIDATES, candidate_codes, department_codes
+from filter_index import BitmapIndex
+
+
+def vote_matrix(data, columns):
+    """The given columns as one float64 matrix; non-numeric cells become NaN."""
+    frame = data[columns]
+    if all(pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes):
+        return frame.to_numpy(dtype=np.float64)
+    return np.column_stack([pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64) for column in columns])
+
+
+class WideResults:
+    """Per-row candidate counts and percentages as aligned NumPy arrays."""
+
+    def __init__(self, departments, votes, counts, percentages, candidates):
+        self.departments = departments
+        self.votes = votes
+        self.counts = counts
+        self.percentages = percentages
+        self.candidates = list(candidates)
+
+    @classmethod
+    def from_frame(cls, data, candidates=CANDIDATES, total="Votes", key="Department", drop_invalid=True):
+        """Build from a raw results frame.
+
+        ``total`` is the column percentages are taken against; ``None`` uses
+        the sum of the candidates' votes. With ``drop_invalid`` rows with no
+        votes or a non-numeric candidate count are left out, as
+        ``process_data`` always did.
+        """
+        counts = vote_matrix(data, candidates)
+        votes = data["Votes"].to_numpy()
+        denominators = counts.sum(axis=1) if total is None else data[total].to_numpy(dtype=np.float64)
+        departments = data[key].to_numpy()
+
+        if drop_invalid:
+            keep = (denominators > 0) & np.isfinite(counts).all(axis=1)
+            if not keep.all():
+                departments, votes, counts, denominators = departments[keep], votes[keep], counts[keep], denominators[keep]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentages = counts / denominators[:, None] * 100
+        return cls(departments, votes, counts, percentages, candidates)
+
+    def __len__(self):
+        return len(self.departments)
+
+    @cached_property
+    def department_codes(self):
+        return department_codes.encode(self.departments, add=True)
+
+    @cached_property
+    def department_index(self):
+        """Row bitmaps per department code, for the dropdown filter."""
+        return BitmapIndex(self.department_codes)
+
+    @cached_property
+    def candidate_codes(self):
+        return candidate_codes.encode(self.candidates, add=True)
+
+    def by_department(self):
+        """Keep only the latest row for each department."""
+        _, last = np.unique(self.department_codes[::-1], return_index=True)
+        keep = np.sort(len(self) - 1 - last)
+        return WideResults(self.departments[keep], self.votes[keep], self.counts[keep], self.percentages[keep], self.candidates)
+
+    @cached_property
+    def wide(self):
+        """Department, Votes and one percentage column per candidate."""
+        data = pd.DataFrame(self.percentages, columns=self.candidates)
+        data.insert(0, "Votes", self.votes)
+        data.insert(0, "Department", self.departments)
+        return data
+
+    @cached_property
+    def tidy(self):
+        """The long Department/Votes/Candidate/Percentage frame, candidate by candidate."""
+        k = len(self.candidates)
+        return pd.DataFrame({
+            "Department": np.tile(self.departments, k),
+            "Votes": np.tile(self.votes, k),
+            "Candidate": np.repeat(np.array(self.candidates, dtype=object), len(self)),
+            "Percentage": self.percentages.T.ravel(),
+        })
+
+
+def process_data(data, candidates=CANDIDATES):
+    """Drop-in replacement for the dashboards' old ``process_data``."""
+    return WideResults.from_frame(data, candidates).tidy
@@ -0,0 +1,163 @@
+"""Incremental VADER sentiment for the comments panel.
+
+One ``SentimentIntensityAnalyzer`` is built per process. Compound scores are
+cached by a 64-bit hash of the comment text, so a refreshed comments sheet
+only scores the comments it hasn't seen before. Per-candidate averages are
+running sums adjusted by the difference between the old and new corpus.
+Scores produced offline by ``sentiment_pipeline.py`` land in a
+``ScoreStore`` that the dashboard only reads.
+"""
+import hashlib
+import os
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def text_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def score_texts(texts):
+    """Compound scores for a batch of texts with the process-wide analyzer."""
+    analyzer = get_analyzer()
+    return np.fromiter((analyzer.polarity_scores(text)["compound"] for text in texts), dtype=np.float64)
+
+
+SCORE_RECORD = np.dtype([("hash", "<u8"), ("score", "<f4")])
+
+
+class ScoreStore:
+    """Append-only file of (text hash, compound score) records.
+
+    Records are 12 bytes each; a reader remembers its offset and only reads
+    what was appended since, ignoring a trailing partial record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offset = 0
+
+    def append(self, hashes, scores):
+        records = np.empty(len(hashes), dtype=SCORE_RECORD)
+        records["hash"] = hashes
+        records["score"] = scores
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+
+    def read_all(self):
+        if not os.path.exists(self.path):
+            return np.empty(0, dtype=SCORE_RECORD)
+        size = os.path.getsize(self.path) // SCORE_RECORD.itemsize
+        return np.fromfile(self.path, dtype=SCORE_RECORD, count=size)
+
+    def size(self):
+        """Bytes written so far; changes whenever scores are appended."""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def read_new(self):
+        """Records appended since the previous call."""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=SCORE_RECORD)
+        if size < self._offset:
+            # The store was rebuilt from scratch
+            self._offset = 0
+        count = (size - self._offset) // SCORE_RECORD.itemsize
+        if count <= 0:
+            return np.empty(0, dtype=SCORE_RECORD)
+        records = np.fromfile(self.path, dtype=SCORE_RECORD, count=count, offset=self._offset)
+        self._offset += count * SCORE_RECORD.itemsize
+        return records
+
+
+class SentimentEngine:
+    """Keep compound scores and per-candidate averages for a comments corpus."""
+
+    def __init__(self, text_column="Comments", candidate_column="Candidate"):
+        self.text_column = text_column
+        self.candidate_column = candidate_column
+        self._lock = threading.Lock()
+        self._scores = {}
+        self._counts = Counter()
+        self._sums = defaultdict(float)
+        self._totals = defaultdict(int)
+        self._version = None
+        self.scored_count = 0
+
+    def add_scores(self, hashes, scores):
+        """Seed the cache with scores computed elsewhere (e.g. the batch pipeline)."""
+        with self._lock:
+            self._scores.update(zip(np.asarray(hashes).tolist(), np.asarray(scores, dtype=np.float64).tolist()))
+
+    def update(self, comments):
+        """Bring the aggregates in line with ``comments``, scoring only unseen texts."""
+        texts = comments[self.text_column].fillna("").astype(str).tolist()
+        candidates = comments[self.candidate_column].tolist()
+        # Like groupby, comments without a candidate don't count towards any average
+        present = comments[self.candidate_column].notna().tolist()
+        hashes = [text_hash(text) for text in texts]
+
+        with self._lock:
+            unseen = {}
+            for h, text in zip(hashes, texts):
+                if h not in self._scores:
+                    unseen[h] = text
+            if unseen:
+                self._scores.update(zip(unseen, score_texts(unseen.values())))
+                self.scored_count += len(unseen)
+
+            counts = Counter(key for key, keep in zip(zip(candidates, hashes), present) if keep)
+            for key in counts.keys() | self._counts.keys():
+                change = counts[key] - self._counts[key]
+                if change:
+                    candidate, h = key
+                    self._sums[candidate] += change * self._scores[h]
+                    self._totals[candidate] += change
+                    if self._totals[candidate] == 0:
+                        self._sums[candidate] = 0.0
+            self._counts = counts
+        return hashes
+
+    def refresh(self, snapshot):
+        """Update from a ``results_store.Snapshot``, once per snapshot version."""
+        if snapshot.version != self._version:
+            self.update(snapshot.data)
+            self._version = snapshot.version
+
+    def scores(self, comments):
+        texts = comments[self.text_column].fillna("").astype(str)
+        return np.array([self._scores[text_hash(text)] for text in texts], dtype=np.float64)
+
+    def averages(self, candidates=None):
+        """Average compound score per candidate, like ``groupby("Candidate").mean()``."""
+        with self._lock:
+            rows = [
+                (candidate, self._sums[candidate] / total)
+                for candidate, total in self._totals.items()
+                if total > 0 and (not candidates or candidate in candidates)
+            ]
+        return pd.DataFrame(sorted(rows), columns=[self.candidate_column, "Sentiment"])
+
+    def metrics(self):
+        return {"cached_scores": len(self._scores), "scored_count": self.scored_count}
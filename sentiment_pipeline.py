@@ -0,0 +1,119 @@
+"""Batch sentiment scoring for large comment corpora.
+
+Splits a comments file into chunks, scores each chunk on a process pool
+and appends the (text hash, compound score) records to a ``ScoreStore``.
+Texts already in the store are skipped, so re-running on a growing file
+only scores the new comments. The dashboard reads the store and never
+runs VADER itself for anything the pipeline has covered.
+
+    python sentiment_pipeline.py comments_data.xlsx --workers 4
+    python sentiment_pipeline.py comments.csv --follow --interval 30
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import read_cached
+from sentiment import ScoreStore, get_analyzer, score_texts, text_hash
+
+
+DEFAULT_STORE = "sentiment_scores.bin"
+
+
+def iter_comments(path, text_column="Comments", chunk_size=50000):
+    """Yield the comment texts of ``path`` in chunks."""
+    if path.lower().endswith(".csv"):
+        for chunk in pd.read_csv(path, usecols=[text_column], chunksize=chunk_size):
+            yield chunk[text_column].fillna("").astype(str).tolist()
+    else:
+        texts = read_cached(path)[text_column].fillna("").astype(str).tolist()
+        for start in range(0, len(texts), chunk_size):
+            yield texts[start:start + chunk_size]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def score_parallel(texts, workers=1, chunk_size=2000, executor=None):
+    """Compound scores for ``texts``, spread over ``workers`` processes."""
+    if workers <= 1 and executor is None:
+        return score_texts(texts)
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers, initializer=get_analyzer) as pool:
+            return score_parallel(texts, workers, chunk_size, pool)
+    results = executor.map(score_texts, _chunks(texts, chunk_size))
+    return np.concatenate(list(results)) if texts else np.empty(0)
+
+
+def run(path, store_path=DEFAULT_STORE, workers=1, chunk_size=2000, text_column="Comments", executor=None):
+    """Score the comments in ``path`` that ``store_path`` doesn't have yet."""
+    if executor is None and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=get_analyzer) as pool:
+            return run(path, store_path, workers, chunk_size, text_column, pool)
+
+    store = ScoreStore(store_path)
+    known = set(store.read_all()["hash"].tolist())
+    scored = 0
+
+    for texts in iter_comments(path, text_column):
+        unseen = {}
+        for text in texts:
+            h = text_hash(text)
+            if h not in known:
+                unseen[h] = text
+        if not unseen:
+            continue
+        scores = score_parallel(list(unseen.values()), workers, chunk_size, executor)
+        store.append(np.fromiter(unseen.keys(), dtype=np.uint64, count=len(unseen)), scores)
+        known.update(unseen)
+        scored += len(unseen)
+
+    return scored
+
+
+def follow(path, store_path=DEFAULT_STORE, workers=1, chunk_size=2000, text_column="Comments", interval=30):
+    """Keep scoring ``path`` whenever it changes."""
+    last = None
+    # One pool for the whole run so workers keep their analyzer between passes
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=get_analyzer) if workers > 1 else None
+    try:
+        while True:
+            st = os.stat(path)
+            if (st.st_mtime_ns, st.st_size) != last:
+                start = time.perf_counter()
+                scored = run(path, store_path, workers, chunk_size, text_column, executor)
+                print(f"scored {scored} new comments in {time.perf_counter() - start:.2f}s")
+                last = (st.st_mtime_ns, st.st_size)
+            time.sleep(interval)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score comment sentiment into a compact store")
+    parser.add_argument("source", help="xlsx or csv file with a comments column")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--column", default="Comments")
+    parser.add_argument("--follow", action="store_true", help="keep watching the source for new comments")
+    parser.add_argument("--interval", type=float, default=30)
+    args = parser.parse_args()
+
+    if args.follow:
+        follow(args.source, args.store, args.workers, args.chunk_size, args.column, args.interval)
+    else:
+        start = time.perf_counter()
+        scored = run(args.source, args.store, args.workers, args.chunk_size, args.column)
+        print(f"scored {scored} new comments in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Server-side storage for data the browser only refers to by key.
+
+A ``dcc.Store`` ships its whole value to the browser and back. For frames
+that grow with the number of polling stations that is too much, so the
+browser holds a key and the value stays here, in one of two backends:
+
+* ``MemoryBackend``: a dict in the worker, fastest, not shared
+* ``DiskBackend``: pickles in a private (0700) directory the workers on the
+  host share, scoped to this user and checkout (``private_dir``)
+
+Entries expire ``ttl`` seconds after they were last written or read.
+Values read from the memory backend are shared; callers must not mutate
+them.
+
+The backend defaults to disk and is chosen with ``SERVER_STORE``
+(``memory`` or ``disk``), ``SERVER_STORE_DIR`` and ``SERVER_STORE_TTL``.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+
+from private_dir import app_path, private_directory
+
+
+DEFAULT_BACKEND = os.environ.get("SERVER_STORE", "disk")
+DEFAULT_DIRECTORY = os.environ.get("SERVER_STORE_DIR") or app_path("server_store")
+DEFAULT_TTL = float(os.environ.get("SERVER_STORE_TTL", 600))
+
+
+class MemoryBackend:
+    def __init__(self, ttl=DEFAULT_TTL, sweep_every=64):
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._puts = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < now:
+                del self._entries[key]
+                return None
+            self._entries[key] = (now + self.ttl, value)
+            return value
+
+    def touch(self, key):
+        """Keep an entry alive without reading it; False if there is none."""
+        return self.get(key) is not None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._puts += 1
+            if self._puts % self.sweep_every == 0:
+                self._sweep()
+
+    def _sweep(self):
+        now = time.monotonic()
+        for key in [key for key, (expires, _) in self._entries.items() if expires < now]:
+            del self._entries[key]
+
+    def sweep(self):
+        with self._lock:
+            self._sweep()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend:
+    def __init__(self, directory=DEFAULT_DIRECTORY, ttl=DEFAULT_TTL, sweep_every=64):
+        self.directory = directory
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self._puts = 0
+        # Pickles are only loaded from a directory nobody else can write to
+        private_directory(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            # Reading keeps the entry alive
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        return value
+
+    def touch(self, key):
+        """Keep an entry alive without unpickling it; False if there is none."""
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                return False
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key, value):
+        tmp = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self._puts += 1
+        if self._puts % self.sweep_every == 0:
+            self.sweep()
+
+    def sweep(self):
+        expired = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pkl"):
+                continue
+            try:
+                if entry.stat().st_mtime < expired:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".pkl"))
+
+
+def make_backend(kind=DEFAULT_BACKEND, ttl=DEFAULT_TTL, directory=DEFAULT_DIRECTORY):
+    if kind == "memory":
+        return MemoryBackend(ttl=ttl)
+    if kind == "disk":
+        return DiskBackend(directory, ttl=ttl)
+    raise ValueError(f"unknown server store backend {kind!r}")
+
+
+class ServerStore:
+    """Values by key in a TTL backend; the browser keeps only the key."""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else make_backend()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.backend.get(key) if key else None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, value, key=None):
+        """Store ``value``; returns its key, a fresh one unless ``key`` is given."""
+        key = key or uuid.uuid4().hex
+        self.backend.put(key, value)
+        return key
+
+    def ensure(self, key, build):
+        """Store ``build()`` under ``key`` unless it is already there; returns the key."""
+        if self.backend.touch(key):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.backend.put(key, build())
+        return key
+
+    def get_or_build(self, key, build):
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(value, key)
+        return value
+
+    def metrics(self):
+        return {"backend": type(self.backend).__name__, "entries": len(self.backend), "hits": self.hits, "misses": self.misses}
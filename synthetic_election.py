@@ -0,0 +1,212 @@
+"""Reproducible synthetic elections at national scale, for load and scaling tests.
+
+The real datasets are 45 departments reported three times. A
+``SyntheticElection`` generates any number of regions, departments,
+polling stations (bureaux), candidates and reporting waves instead, with
+counts that add up the way official results do:
+
+* ``Registered`` per bureau, and ``Voters`` (= ``Enveloppes``) from a
+  department turnout plus bureau noise
+* ``Nuls`` a small share of the voters, ``Votes`` (the cast ballots) the rest
+* candidate votes summing to ``Votes``, from national shares, department
+  leanings and bureau noise
+
+Every bureau reports once per wave, with cumulative counts that reach
+the final result in the last wave. Rows come out in time order, wave by
+wave, like ``replay_dataset`` output. They are generated
+``chunk_bureaux`` bureaux at a time, each block of bureaux from its own seed,
+so output is streamed to disk and memory does not grow with the number
+of bureaux:
+
+    python synthetic_election.py synthetic.csv --bureaux 150000 --waves 4 --seed 1
+
+The columnar sidecar is not written by default: building it parses the
+whole output in memory. Pass ``--sidecar`` for files small enough for that,
+or let the first ``read_cached`` build it.
+
+With the default 14 regions, 45 departments and 5 candidates the real
+names are used, so the dashboards and boundaries work unchanged. Beyond
+those, regions, departments and candidates get numbered names.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from dimensions import CANDIDATES, REGIONS
+from replay_dataset import SECONDS_PER_DAY, format_times, write_replay
+
+
+CHUNK_BUREAUX = 100_000
+
+# Bureaux drawn from one seed; the output doesn't depend on the chunk size
+SEED_BLOCK = 8192
+
+
+def geography(regions=len(REGIONS), departments=None):
+    """Region names, department names and each department's region index."""
+    if departments is None:
+        departments = sum(len(names) for names in REGIONS.values()) if regions == len(REGIONS) else regions * 3
+    if regions == len(REGIONS) and departments == sum(len(names) for names in REGIONS.values()):
+        region_names = list(REGIONS)
+        department_names = [name for names in REGIONS.values() for name in names]
+        department_region = np.array([i for i, names in enumerate(REGIONS.values()) for _ in names])
+        return region_names, department_names, department_region
+    if departments < regions:
+        raise ValueError("every region needs at least one department")
+    region_names = [f"Region {i + 1:02d}" for i in range(regions)]
+    department_names = [f"Department {i + 1:03d}" for i in range(departments)]
+    return region_names, department_names, np.arange(departments) * regions // departments
+
+
+def candidate_names(candidates=len(CANDIDATES)):
+    return (CANDIDATES + [f"Candidate {i + 1}" for i in range(len(CANDIDATES), candidates)])[:candidates]
+
+
+class SyntheticElection:
+    def __init__(
+        self,
+        regions=len(REGIONS),
+        departments=None,
+        bureaux=15000,
+        candidates=len(CANDIDATES),
+        waves=3,
+        seed=0,
+        turnout=0.66,
+        null_share=0.006,
+        start="00:00:00",
+        span_seconds=SECONDS_PER_DAY - 1,
+        time_format="time",
+        chunk_bureaux=CHUNK_BUREAUX,
+    ):
+        self.regions, self.departments, self.department_region = geography(regions, departments)
+        self.candidates = candidate_names(candidates)
+        self.bureaux = bureaux
+        self.waves = waves
+        self.seed = seed
+        self.null_share = null_share
+        self.start = start
+        self.span_seconds = span_seconds
+        self.time_format = time_format
+        self.chunk_bureaux = chunk_bureaux
+
+        # Department-level traits; small enough to keep whatever the bureaux count
+        rng = np.random.default_rng([seed, 0])
+        count = len(self.departments)
+        self.department_weights = rng.lognormal(0, 0.6, count)
+        self.department_weights /= self.department_weights.sum()
+        self.department_turnout = np.clip(rng.normal(turnout, 0.06, count), 0.3, 0.95)
+        national = rng.dirichlet(np.full(len(self.candidates), 2.0))
+        self.department_shares = rng.dirichlet(national * 40 + 0.1, count)
+
+    @property
+    def rows(self):
+        return self.bureaux * self.waves
+
+    def final_counts(self, first, last):
+        """Final results of bureaux ``first`` to ``last - 1``; the same on every call."""
+        blocks = [self._block(block) for block in range(first // SEED_BLOCK, (last - 1) // SEED_BLOCK + 1)]
+        offset = first - first // SEED_BLOCK * SEED_BLOCK
+        return {
+            name: np.concatenate([block[name] for block in blocks])[offset:offset + last - first]
+            for name in blocks[0]
+        }
+
+    def _block(self, block):
+        rng = np.random.default_rng([self.seed, 1, block])
+        size = min(SEED_BLOCK, self.bureaux - block * SEED_BLOCK)
+        department = rng.choice(len(self.departments), size, p=self.department_weights)
+        registered = np.clip(np.rint(rng.normal(520, 140, size)), 50, 900).astype(np.int64)
+        turnout = np.clip(self.department_turnout[department] + rng.normal(0, 0.05, size), 0.05, 1.0)
+        voters = rng.binomial(registered, turnout)
+        nuls = rng.binomial(voters, self.null_share)
+        votes = voters - nuls
+
+        # Bureau shares scattered around the department's (a Dirichlet per row)
+        shares = rng.gamma(self.department_shares[department] * 150 + 0.05)
+        shares /= shares.sum(axis=1, keepdims=True)
+        return {
+            "department": department,
+            "registered": registered,
+            "nuls": nuls,
+            "candidates": rng.multinomial(votes, shares),
+        }
+
+    def _timestamps(self, positions):
+        step = self.span_seconds / max(self.rows, 1)
+        if self.time_format == "datetime":
+            return pd.Timestamp(self.start) + pd.to_timedelta(positions * step, unit="s")
+        return format_times(pd.Timedelta(self.start).total_seconds() + np.floor(positions * step))
+
+    def iter_rows(self):
+        """Frames of results rows in report order, ``chunk_bureaux`` rows at a time."""
+        department_names = np.array(self.departments, dtype=object)
+        region_names = np.array(self.regions, dtype=object)
+        for wave in range(self.waves):
+            # Earlier waves hold a share of each count; the last one the final result
+            fraction = (wave + 1) / self.waves
+            for first in range(0, self.bureaux, self.chunk_bureaux):
+                last = min(first + self.chunk_bureaux, self.bureaux)
+                final = self.final_counts(first, last)
+                candidates = np.floor(final["candidates"] * fraction).astype(np.int64)
+                nuls = np.floor(final["nuls"] * fraction).astype(np.int64)
+                votes = candidates.sum(axis=1)
+                voters = votes + nuls
+
+                frame = pd.DataFrame({
+                    "Region": region_names[self.department_region[final["department"]]],
+                    "Department": department_names[final["department"]],
+                    "Bureau": np.arange(first, last),
+                    "Number of offices": 1,
+                    "Registered": final["registered"],
+                    "Voters": voters,
+                    "Enveloppes": voters,
+                    "Nuls": nuls,
+                    "Votes": votes,
+                })
+                for j, candidate in enumerate(self.candidates):
+                    frame[candidate] = candidates[:, j]
+                frame["Timestamp"] = self._timestamps(wave * self.bureaux + np.arange(first, last))
+                yield frame
+
+    def write(self, path, sidecar=False):
+        """Stream the election to ``path`` (csv, parquet or xlsx); returns the row count."""
+        return write_replay(self.iter_rows(), path, sidecar=sidecar)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="file to write (.csv, .parquet or .xlsx)")
+    parser.add_argument("--regions", type=int, default=len(REGIONS))
+    parser.add_argument("--departments", type=int, help="default: the real 45 with 14 regions, else 3 per region")
+    parser.add_argument("--bureaux", type=int, default=15000, help="polling stations in the whole country")
+    parser.add_argument("--candidates", type=int, default=len(CANDIDATES))
+    parser.add_argument("--waves", type=int, default=3, help="reports per bureau")
+    parser.add_argument("--turnout", type=float, default=0.66, help="national turnout the departments scatter around")
+    parser.add_argument("--start", default=None, help='first report: "HH:MM:SS", or a date and time with --time-format datetime')
+    parser.add_argument("--span-seconds", type=float, default=SECONDS_PER_DAY - 1, help="time from the first report to the last")
+    parser.add_argument("--time-format", choices=["time", "datetime"], default="time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-bureaux", type=int, default=CHUNK_BUREAUX)
+    parser.add_argument("--sidecar", action="store_true", help="also write the columnar sidecar (loads the whole file once)")
+    args = parser.parse_args()
+
+    election = SyntheticElection(
+        regions=args.regions,
+        departments=args.departments,
+        bureaux=args.bureaux,
+        candidates=args.candidates,
+        waves=args.waves,
+        seed=args.seed,
+        turnout=args.turnout,
+        start=args.start or ("2022-04-10 00:00:00" if args.time_format == "datetime" else "00:00:00"),
+        span_seconds=args.span_seconds,
+        time_format=args.time_format,
+        chunk_bureaux=args.chunk_bureaux,
+    )
+    rows = election.write(args.output, sidecar=args.sidecar)
+    print(f"{args.output}: {rows} rows, {election.bureaux} bureaux in {len(election.departments)} departments")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import cache_dir, read_cached
+
+
+def _mapped(values):
+    while values is not None and not isinstance(values, np.memmap):
+        values = getattr(values, "base", None)
+    return values is not None
+
+
+def _source(tmp_path, data):
+    path = str(tmp_path / "data.csv")
+    with open(path, "w") as f:
+        f.write("placeholder\n")
+    return path, lambda path: data.copy()
+
+
+def test_numeric_columns_are_loaded_without_a_copy(tmp_path):
+    data = pd.DataFrame({"Votes": np.arange(5), "Share": np.linspace(0, 1, 5), "Name": list("abcde")})
+    path, reader = _source(tmp_path, data)
+    read_cached(path, reader=reader)
+    cached = read_cached(path, reader=reader)
+
+    pd.testing.assert_frame_equal(cached, data)
+    assert _mapped(cached["Votes"].to_numpy()) and _mapped(cached["Share"].to_numpy())
+    # Copy-on-write: the frame can be changed, the files stay as they were
+    cached.loc[0, "Votes"] = 99
+    assert read_cached(path, reader=reader)["Votes"].iloc[0] == 0
+
+
+def test_mixed_columns_round_trip_without_pickles(tmp_path):
+    values = ["25,3", datetime.datetime(2023, 3, 25), 4.5, 7, True, None, datetime.time(8, 30)]
+    data = pd.DataFrame({"Reading": pd.Series(values, dtype=object)})
+    path, reader = _source(tmp_path, data)
+    read_cached(path, reader=reader)
+    cached = read_cached(path, reader=reader)
+
+    for expected, actual in zip(values[:5] + values[6:], cached["Reading"].drop(index=5)):
+        assert type(actual) is type(expected) and actual == expected
+    assert pd.isna(cached["Reading"].iloc[5])
+    for name in os.listdir(cache_dir(path)):
+        if name.endswith(".npy"):
+            assert np.load(os.path.join(cache_dir(path), name), allow_pickle=False).dtype != object
+
+
+def test_unknown_objects_leave_the_source_uncached(tmp_path):
+    data = pd.DataFrame({"Reading": pd.Series([1, {"a": 1}], dtype=object)})
+    path, reader = _source(tmp_path, data)
+    assert read_cached(path, reader=reader)["Reading"].tolist() == [1, {"a": 1}]
+    assert not os.path.exists(cache_dir(path))
@@ -0,0 +1,33 @@
+import numpy as np
+
+import dakar_rain
+from bench_rain_ingest import write_rain
+
+
+def test_partial_last_chunk_gets_the_planned_trees(tmp_path):
+    path = str(tmp_path / "rain.csv")
+    # Three full chunks and a partial fourth
+    write_rain(path, 3 * 200 + 50)
+
+    def chunks():
+        return dakar_rain.readings(path, chunk_rows=200)
+
+    scaler, clf = dakar_rain.train(chunks, n_estimators=10)
+    assert clf.n_estimators == 10
+    assert len(clf.estimators_) == 10
+
+
+def test_fits_wait_for_both_classes():
+    assert dakar_rain.fit_points([{0}, {0}, {1}, {0, 1}, {1}]) == [False, False, True, True, False]
+
+
+def test_more_fits_than_trees_pass_rows_on():
+    # One tree, two fits: the first fit's rows go to the second
+    def chunks():
+        for label in (0, 1, 0, 1):
+            X = np.full((4, 2), float(label))
+            yield X, np.full(4, label), np.zeros(4, dtype=int)
+
+    scaler, clf = dakar_rain.train(chunks, n_estimators=1)
+    assert len(clf.estimators_) == 1
+    assert clf.predict(scaler.transform([[0.0, 0.0], [1.0, 1.0]])).tolist() == [0, 1]
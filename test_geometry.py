@@ -0,0 +1,49 @@
+import numpy as np
+
+import fast_figures
+from geometry import feature_ids, feature_index, load_boundaries, simplify_geojson
+
+
+def _square(x, y):
+    return {"type": "Polygon", "coordinates": [[[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]]}
+
+
+DEPARTMENTS = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "properties": {"NAME_2": "DAKAR"}, "geometry": _square(-17.5, 14.5)},
+        {"type": "Feature", "properties": {"NAME_2": "Médina"}, "geometry": _square(-16.5, 14.5)},
+    ],
+}
+
+
+def _drawn(figure, geojson):
+    # Plotly draws a location only when a feature has that id
+    ids = {feature["id"] for feature in geojson["features"]}
+    trace = figure["data"][0]
+    assert trace["featureidkey"] == "id"
+    return {name for name, location in zip(trace["customdata"][:, 0], trace["locations"]) if location in ids}
+
+
+def test_departments_are_drawn_under_any_spelling():
+    geojson = simplify_geojson(DEPARTMENTS, 0.01)
+    index = feature_index(geojson)
+    departments = np.array(["Dakar", "Medina", "Thies"], dtype=object)
+    percentages = np.array([[40.0], [55.0], [60.0]])
+
+    figure = fast_figures.map_figure(departments, percentages, ["Candidate"], boundaries=index)
+    assert _drawn(figure, geojson) == {"Dakar", "Medina"}
+    # Thies has no boundary and gets no location
+    assert figure["data"][0]["locations"][2] is None
+
+
+def test_features_without_ids_get_one():
+    geojson = simplify_geojson(DEPARTMENTS, 0.01)
+    ids = [feature["id"] for feature in geojson["features"]]
+    assert None not in ids and len(set(ids)) == len(ids)
+    assert feature_ids(["dakar", "Pikine"], feature_index(geojson)).tolist() == [ids[0], None]
+
+
+def test_shipped_boundaries_have_ids():
+    geojson = load_boundaries()
+    assert all(feature.get("id") is not None for feature in geojson["features"])
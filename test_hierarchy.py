@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from dimensions import Dimension
+from hierarchy import ResultsHierarchy
+
+
+def _hierarchy():
+    regions = {"Dakar": ["Dakar", "Pikine"], "Thies": ["Thies"]}
+    return ResultsHierarchy(["Votes"], regions=regions, dimension=Dimension("Department"))
+
+
+def test_rows_without_department_are_left_out():
+    hierarchy = _hierarchy()
+    rows = pd.DataFrame({
+        "Department": ["Dakar", np.nan, "Thies", None, "Pikine"],
+        "Votes": [10, 99, 5, 99, 7],
+    })
+    changed = hierarchy.apply(rows)
+
+    assert hierarchy.rows_without_department == 2
+    assert sorted(hierarchy.dimension.decode(changed)) == ["Dakar", "Pikine", "Thies"]
+    assert hierarchy.national.tolist() == [22]
+    departments = hierarchy.department_frame().set_index("Department")["Votes"]
+    assert departments.to_dict() == {"Dakar": 10, "Thies": 5, "Pikine": 7}
+    regions = hierarchy.region_frame().set_index("Region")["Votes"]
+    assert regions.to_dict() == {"Dakar": 17, "Thies": 5}
+
+
+def test_batch_of_rows_without_department_changes_nothing():
+    hierarchy = _hierarchy()
+    hierarchy.apply(pd.DataFrame({"Department": ["Dakar"], "Votes": [10]}))
+    changed = hierarchy.apply(pd.DataFrame({"Department": [np.nan], "Votes": [99]}))
+
+    assert len(changed) == 0
+    assert hierarchy.national.tolist() == [10]
+    assert hierarchy.rows_without_department == 1
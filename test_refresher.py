@@ -0,0 +1,70 @@
+import os
+
+from refresher import Refresher
+
+
+def _pair(tmp_path, source):
+    seen = {"text": None}
+
+    def refresh():
+        with open(source) as f:
+            text = f.read()
+        if text == seen["text"]:
+            return None
+        seen["text"] = text
+        return text
+
+    directory = str(tmp_path / "refresher")
+    leader = Refresher(refresh, "results", initial="initial", source=source, directory=directory)
+    follower = Refresher(lambda: None, "results", initial="initial", source=source, directory=directory)
+    # Both poll from this thread: the first to step takes the lock
+    leader.step()
+    assert leader.leader
+    follower.step()
+    assert not follower.leader
+    return leader, follower
+
+
+def _write(path, text, replace=False):
+    target = f"{path}.tmp" if replace else path
+    with open(target, "w") as f:
+        f.write(text)
+    if replace:
+        os.replace(target, path)
+
+
+def test_follower_picks_up_snapshot_after_source_is_replaced(tmp_path):
+    source = str(tmp_path / "results.csv")
+    _write(source, "a\n1\n")
+    leader, follower = _pair(tmp_path, source)
+    assert follower.current().value == "a\n1\n"
+
+    # An atomic replace gives the csv a new inode
+    inode = os.stat(source).st_ino
+    _write(source, "a\n1\n2\n", replace=True)
+    assert os.stat(source).st_ino != inode
+
+    leader.step()
+    follower.step()
+    assert follower.current().value == "a\n1\n2\n"
+    assert follower.metrics()["ignored"] == 0
+
+    leader.stop()
+    follower.stop()
+
+
+def test_follower_ignores_snapshot_of_a_replaced_file(tmp_path):
+    source = str(tmp_path / "results.csv")
+    _write(source, "a\n1\n")
+    leader, follower = _pair(tmp_path, source)
+
+    # The leader publishes, then the file is replaced before the follower polls
+    _write(source, "a\n1\n2\n")
+    leader.step()
+    _write(source, "b\n", replace=True)
+    follower.step()
+    assert follower.current().value == "a\n1\n"
+    assert follower.metrics()["ignored"] == 1
+
+    leader.stop()
+    follower.stop()
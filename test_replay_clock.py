@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import time
+
+import replay_clock
+
+
+def _boot_of_new_process(**env):
+    code = "import replay_clock; print(replay_clock.boot_id())"
+    environment = {k: v for k, v in os.environ.items() if k != "REPLAY_BOOT"}
+    environment.update(env)
+    return subprocess.check_output([sys.executable, "-c", code], env=environment, text=True).strip()
+
+
+def test_restart_from_the_same_shell_is_a_new_boot():
+    # Both have this process as parent; each is its own server
+    assert _boot_of_new_process() != _boot_of_new_process()
+
+
+def test_pinned_boot_is_shared():
+    assert _boot_of_new_process(REPLAY_BOOT="release-42") == "release-42"
+    assert _boot_of_new_process(REPLAY_BOOT="release-42") == _boot_of_new_process(REPLAY_BOOT="release-42")
+
+
+def test_restarted_app_replays_from_the_start(tmp_path):
+    path = str(tmp_path / "replay.sqlite")
+    first = replay_clock.ReplayClock(path, "results", speed=1.0, refresh_seconds=5, boot="1:100")
+    again = replay_clock.ReplayClock(path, "results", speed=1.0, refresh_seconds=5, boot="1:100")
+    assert again.started_at == first.started_at
+    time.sleep(0.01)
+    restarted = replay_clock.ReplayClock(path, "results", speed=1.0, refresh_seconds=5, boot="2:200")
+    assert restarted.started_at > first.started_at
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from results_store import ResultsStore, read_results
+
+
+def _write(path, times):
+    pd.DataFrame({
+        "Department": [f"D{i}" for i in range(len(times))],
+        "Votes": range(len(times)),
+        "Timestamp": times,
+    }).to_csv(path, index=False)
+
+
+def test_unsorted_feed_is_replayed_in_time_order(tmp_path):
+    path = str(tmp_path / "results.csv")
+    _write(path, ["00:00:04", "00:00:02", "00:00:06", "00:00:02"])
+    snapshot = ResultsStore(path, loader=read_results).snapshot()
+
+    # Stable: the two 00:00:02 rows keep their file order
+    assert snapshot.data["Department"].tolist() == ["D1", "D3", "D0", "D2"]
+    start = snapshot.start
+    assert snapshot.rows_as_of(start) == 2
+    assert snapshot.rows_as_of(start + pd.Timedelta(seconds=2)) == 3
+    assert snapshot.as_of(start + pd.Timedelta(seconds=10))["Votes"].tolist() == [1, 3, 0, 2]
+
+
+def test_unsorted_data_from_other_loaders_does_not_raise(tmp_path):
+    path = str(tmp_path / "results.csv")
+    _write(path, ["00:00:04", "00:00:02", "00:00:06"])
+
+    def unsorted(path):
+        data = pd.read_csv(path)
+        data["Timestamp"] = pd.to_datetime("2022-04-10 " + data["Timestamp"], utc=True)
+        return data
+
+    snapshot = ResultsStore(path, loader=unsorted).snapshot()
+    start = snapshot.data["Timestamp"].min()
+    # The second row waits for the first
+    assert snapshot.rows_as_of(start) == 1
+    assert snapshot.rows_as_of(start + pd.Timedelta(seconds=2)) == 2
+    assert snapshot.rows_as_of(start + pd.Timedelta(seconds=4)) == 3
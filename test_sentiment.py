@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from sentiment import SentimentEngine
+
+
+def test_blank_candidate_is_left_out_of_the_averages():
+    comments = pd.DataFrame({
+        "Comments": ["bravo Macky", "non merci", "good job", "bad"],
+        "Candidate": ["Macky SALL", np.nan, "Ousmane Sonko", None],
+    })
+    engine = SentimentEngine()
+    engine.update(comments)
+
+    averages = engine.averages()
+    expected = comments.assign(Sentiment=engine.scores(comments)).groupby("Candidate", as_index=False)["Sentiment"].mean()
+    assert averages["Candidate"].tolist() == ["Macky SALL", "Ousmane Sonko"]
+    assert np.allclose(averages["Sentiment"], expected["Sentiment"])
+
+    # Filling the blank in later moves its comment into that candidate's average
+    comments.loc[1, "Candidate"] = "Macky SALL"
+    engine.update(comments)
+    assert engine.averages(["Macky SALL"])["Candidate"].tolist() == ["Macky SALL"]
+    assert np.isclose(engine.averages(["Macky SALL"])["Sentiment"][0], engine.scores(comments)[:2].mean())
@@ -0,0 +1,113 @@
+"""One shared computation per data tick.
+
+A tick is a results snapshot cut at the replay position. The dashboard,
+results table and push channel used to each slice the data and run
+``process_data`` for themselves; they now ask a ``TickCache`` for the tick
+and read its derived views, which are built on first use and then shared.
+
+Ticks are keyed by ``"<fingerprint>:<rows>"``, the same version string the
+live channel pushes to browsers, so every callback fired by one version
+change sees the same rows even if the replay moves on meanwhile.
+
+Each tick's ``ResultsHierarchy`` is carried forward from the previous tick
+of the same file when there is one, so only the newly reported rows are
+folded in.
+"""
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+from hierarchy import ResultsHierarchy
+from results_transform import WideResults
+
+
+class Tick:
+    def __init__(self, snapshot, rows, base=None):
+        self.snapshot = snapshot
+        self.rows = rows
+        self.version = f"{snapshot.fingerprint}:{rows}"
+        # An earlier tick of the same snapshot whose hierarchy is already built
+        self._base = base
+
+    @cached_property
+    def data(self):
+        return self.snapshot.data.iloc[:self.rows]
+
+    @cached_property
+    def hierarchy(self):
+        base, self._base = self._base, None
+        if base is not None:
+            hierarchy = base.hierarchy.copy()
+            hierarchy.apply(self.snapshot.data.iloc[base.rows:self.rows])
+        else:
+            hierarchy = ResultsHierarchy()
+            hierarchy.apply(self.data)
+        return hierarchy
+
+    @cached_property
+    def departments(self):
+        """The department rollup, one row per reporting department."""
+        return self.hierarchy.department_frame()
+
+    @cached_property
+    def results(self):
+        return WideResults.from_frame(self.departments)
+
+    @cached_property
+    def tidy(self):
+        return self.results.tidy
+
+    @cached_property
+    def table(self):
+        """Votes per department and candidate, from the department rollup."""
+        departments = self.departments
+        candidates = sorted(self.results.candidates)
+        return departments[["Department"] + candidates].sort_values("Department", ignore_index=True)
+
+
+class TickCache:
+    """Recent ticks by version; ``position()`` returns the live (snapshot, rows)."""
+
+    def __init__(self, position, size=4):
+        self.position = position
+        self.size = size
+        self._lock = threading.Lock()
+        self._ticks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _tick(self, snapshot, rows):
+        version = f"{snapshot.fingerprint}:{rows}"
+        with self._lock:
+            tick = self._ticks.get(version)
+            if tick is not None and tick.snapshot is snapshot:
+                self._ticks.move_to_end(version)
+                self.hits += 1
+                return tick
+            tick = Tick(snapshot, rows, base=self._base_for(snapshot, rows))
+            self._ticks[version] = tick
+            self.misses += 1
+            while len(self._ticks) > self.size:
+                self._ticks.popitem(last=False)
+            return tick
+
+    def _base_for(self, snapshot, rows):
+        bases = [
+            tick for tick in self._ticks.values()
+            if tick.snapshot is snapshot and tick.rows <= rows and "hierarchy" in tick.__dict__
+        ]
+        return max(bases, key=lambda tick: tick.rows, default=None)
+
+    def current(self):
+        return self._tick(*self.position())
+
+    def at(self, version):
+        """The tick for a pushed version string, or the current one if it is stale."""
+        snapshot, rows = self.position()
+        fingerprint, _, pinned = str(version or "").rpartition(":")
+        if fingerprint == snapshot.fingerprint and pinned.isdigit() and 0 < int(pinned) <= len(snapshot):
+            rows = int(pinned)
+        return self._tick(snapshot, rows)
+
+    def metrics(self):
+        return {"ticks": len(self._ticks), "hits": self.hits, "misses": self.misses}
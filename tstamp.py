@@ -1,6 +1,5 @@
 import pandas as pd
-import random
-from datetime import timedelta
+from replay_dataset import iter_replay, write_replay
 
 # Read the Excel file
 df = pd.read_excel('elections_senegal.xlsx')
@@ -8,31 +7,10 @@ df = pd.read_excel('elections_senegal.xlsx')
 # Remove spaces from column names
 df = df.rename(columns=lambda x: x.replace(' ', '_'))
 
-# Create a new 'Timestamp' column with random dates
-start_date = pd.Timestamp(2022, 1, 1)
-end_date = pd.Timestamp(2022, 3, 31)
-df['Timestamp'] = [start_date + pd.Timedelta(days=random.randint(0, 89)) for _ in range(len(df))]
+# Split each department into three rows, 5 seconds apart from 2022-01-01 00:00:05
+# (see replay_dataset.py for bigger fan-outs, jitter and other formats)
+chunks = iter_replay(df, fan_out=3, step_seconds=5, start="2022-01-01", time_format="datetime")
 
-# Split each department into multiple rows with different timestamps
-new_rows = []
-current_time = start_date
-
-for _, row in df.iterrows():
-    for i in range(1, 4):
-        new_row = {}
-        for col in df.columns:
-            if col == 'Department':
-                new_row[col] = row[col]  # Keep the original department name
-            elif col == 'Timestamp':
-                current_time += timedelta(seconds=5)
-                new_row[col] = current_time  # Assign the current_time as the new timestamp
-            else:
-                new_row[col] = row[col]
-        new_rows.append(new_row)
-
-# Create a new DataFrame from the list of new rows
-new_df = pd.DataFrame(new_rows)
-
-# Save the new DataFrame to excel file
-new_df.to_excel('elections_senegal_with_timestamps.xlsx', index=False)
-print(new_df)
+# Save the new rows to an Excel file, with its columnar sidecar
+write_replay(chunks, 'elections_senegal_with_timestamps.xlsx')
+print(pd.read_excel('elections_senegal_with_timestamps.xlsx'))